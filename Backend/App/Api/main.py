@@ -1,18 +1,69 @@
-from fastapi import FastAPI
-from Backend.App.Api import standings, teams, players, player_predictions, team_predictions
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from Backend.App.Api import standings, teams, players, player_predictions, team_predictions, system, metrics
+from Backend.App.Utils.http_client import close_client
+from Backend.App.Utils.standings_snapshot import standings_snapshot
+from Backend.App.Utils import tracing
+from Backend.App.Ml_Models.registry import model_registry
+from Backend.App.Ml_Models.model_pool import model_pool, ModelPoolBusy
+from Backend.App.Ml_Models.feature_store import FeatureWindowExceeded
+from Backend.App.Ml_Models.prewarm import prewarmer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Without trained models the processors fall back to fitting per request
+    model_registry.load(os.getenv("MODEL_VERSION"))
+    await model_pool.start(model_registry.version)
+    standings_snapshot.start()
+    prewarmer.start()
+    yield
+    await prewarmer.stop()
+    await standings_snapshot.stop()
+    await model_pool.stop()
+    await close_client()
 
 app = FastAPI(
     title="Football Stats API",
     description="API for football statistics including standings, team comparisons, and player stats",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+@app.exception_handler(ModelPoolBusy)
+async def model_pool_busy(request: Request, exc: ModelPoolBusy):
+    return JSONResponse({"detail": str(exc)}, status_code=429, headers={"Retry-After": "1"})
+
+@app.exception_handler(FeatureWindowExceeded)
+async def feature_window_exceeded(request: Request, exc: FeatureWindowExceeded):
+    return JSONResponse({"detail": str(exc)}, status_code=422)
+
 # Include all routers
 app.include_router(standings.router)
 app.include_router(teams.router)
 app.include_router(players.router)
 app.include_router(player_predictions.router)
 app.include_router(team_predictions.router)
+app.include_router(system.router)
+app.include_router(metrics.router)
+
+if tracing.ENABLED:
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        with tracing.request_trace() as spans:
+            start = time.perf_counter()
+            response = await call_next(request)
+            elapsed = time.perf_counter() - start
+
+        # Labelled by route template, so path parameters do not add series
+        route = request.scope.get("route")
+        tracing.observe_request(route.path if route is not None else "unmatched", elapsed)
+        if tracing.SERVER_TIMING:
+            spans["total"] = elapsed
+            response.headers["Server-Timing"] = tracing.server_timing(spans)
+        return response
 
 @app.get("/")
 async def root():
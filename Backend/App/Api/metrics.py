@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from Backend.App.Utils.fixture_store import fixture_store
+from Backend.App.Utils.http_client import upstream_stats, rate_scheduler
+from Backend.App.Utils.ids import id_cache
+from Backend.App.Utils.tracing import render_metrics
+from Backend.App.Ml_Models.model_pool import model_pool
+from Backend.App.Ml_Models.prediction_cache import prediction_cache
+
+router = APIRouter(tags=["system"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: span and request latencies (with TRACING=1), upstream calls and cache hit rates."""
+    caches = {"fixtures": fixture_store.stats(), "ids": id_cache.stats(), "predictions": prediction_cache.stats()}
+    counters = {
+        "soccer_oracle_upstream_coalesced_total": upstream_stats["coalesced"],
+        "soccer_oracle_cache_hits_total": {(("cache", name),): stats["hits"] for name, stats in caches.items()},
+        "soccer_oracle_cache_disk_hits_total": {(("cache", name),): stats["disk_hits"] for name, stats in caches.items() if "disk_hits" in stats},
+        "soccer_oracle_cache_misses_total": {(("cache", name),): stats["misses"] for name, stats in caches.items()},
+        **{f"soccer_oracle_rate_limit_{name}_total": value
+           for name, value in rate_scheduler.stats.items() if name != "max_queue_depth"},
+        **{f"soccer_oracle_model_pool_{name}_total": value for name, value in model_pool.stats.items()}
+    }
+    gauges = {
+        "soccer_oracle_rate_limit_queue_depth": rate_scheduler.queue_depth(),
+        "soccer_oracle_model_pool_pending": model_pool.info()["pending"],
+        **{f"soccer_oracle_upstream_quota_{name}": value
+           for name, value in rate_scheduler.quota.items() if value is not None}
+    }
+    return PlainTextResponse(
+        render_metrics(counters, gauges),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -1,18 +1,21 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from ..Utils.fetch_data import player_season_stats, player_recent_matches
-from ..Models.models import PlayerRequest
-from ..Ml_Models.player_predictions import PlayerDataProcessor
+from ..Models.models import PlayerRequest, SquadRequest
+from ..Ml_Models.player_predictions import PlayerDataProcessor, predict_squad
 
 router = APIRouter(prefix="/player_predictions", tags=["player_predictions"])
 
 
 @router.post("/recent")
 async def get_player_recent_matches(request: PlayerRequest):
-    data = PlayerDataProcessor(request)
-    return {
-        "goals": data.train_goals_model()['0'],
-        "assists": data.train_assists_model()['0'],
-        "dribbles": data.train_dribbles_model()['0'],
-        "passes": data.train_passes_model()['0'],
-        "tackles": data.train_tackles_model()['0']
-    }
\ No newline at end of file
+    try:
+        data = await PlayerDataProcessor(request).load()
+    except ValueError as e:
+        # Player, team or recent matches not found
+        raise HTTPException(status_code=404, detail=str(e))
+    return await data.predict()
+
+
+@router.post("/squad")
+async def get_squad_predictions(request: SquadRequest):
+    return await predict_squad(request.team_name, request.league_name)
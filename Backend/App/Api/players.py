@@ -7,7 +7,7 @@ router = APIRouter(prefix="/players", tags=["players"])
 
 @router.post("/stats")
 async def get_player_stats(request: PlayerRequest):
-    return player_season_stats(
+    return await player_season_stats(
         request.player_name,
         request.team_name,
         request.league_name,
@@ -16,7 +16,7 @@ async def get_player_stats(request: PlayerRequest):
 
 @router.post("/recent")
 async def get_player_recent(request: PlayerRequest):
-    return player_recent_matches(
+    return await player_recent_matches(
         request.player_name,
         request.team_name,
         request.league_name,
@@ -1,8 +1,8 @@
 from fastapi import APIRouter
-from Backend.App.Utils.fetch_data import league_standings
+from Backend.App.Utils.standings_snapshot import standings_snapshot
 
 router = APIRouter(prefix="/standings", tags=["standings"])
 
 @router.get("/")
 async def get_standings():
-    return league_standings()
\ No newline at end of file
+    return await standings_snapshot.get()
\ No newline at end of file
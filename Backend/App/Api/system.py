@@ -0,0 +1,45 @@
+from fastapi import APIRouter
+from Backend.App.Utils.fixture_store import fixture_store
+from Backend.App.Utils.fixture_index import fixture_index
+from Backend.App.Utils.http_client import upstream_stats, rate_scheduler
+from Backend.App.Utils.ids import id_cache
+from Backend.App.Utils.standings_snapshot import standings_snapshot
+from Backend.App.Ml_Models.registry import model_registry
+from Backend.App.Ml_Models.model_pool import model_pool
+from Backend.App.Ml_Models.prediction_cache import prediction_cache
+from Backend.App.Ml_Models.feature_store import feature_store
+from Backend.App.Ml_Models.prewarm import prewarmer
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+@router.get("/cache")
+async def get_cache_stats():
+    return {
+        "fixtures": fixture_store.stats(),
+        "ids": id_cache.stats(),
+        "fixture_index": fixture_index.info(),
+        "predictions": prediction_cache.stats(),
+        "features": feature_store.info()
+    }
+
+@router.get("/upstream")
+async def get_upstream_stats():
+    return {
+        **upstream_stats,
+        "rate_limit": rate_scheduler.info()
+    }
+
+@router.get("/models")
+async def get_models():
+    return {
+        **model_registry.info(),
+        "pool": model_pool.info()
+    }
+
+@router.get("/standings")
+async def get_standings_info():
+    return standings_snapshot.info()
+
+@router.get("/prewarm")
+async def get_prewarm_info():
+    return prewarmer.info()
@@ -1,40 +1,64 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException
-from Backend.App.Utils.fetch_data import latest_H2H, recent_matches
-from Backend.App.Models.models import TeamsRequest
-from Backend.App.Ml_Models.team_predictions import TeamDataProcessor
+from fastapi.responses import StreamingResponse
+from Backend.App.Models.models import TeamsRequest, TeamsBatchRequest
+from Backend.App.Ml_Models.team_predictions import TeamDataProcessor, predict_batch, predict_matchups
+from Backend.App.Ml_Models.model_pool import ModelPoolBusy
+from Backend.App.Ml_Models.feature_store import FeatureWindowExceeded
+from Backend.App.Ml_Models.matchup_context import MatchupContext
 
 router = APIRouter(prefix="/team_predictions", tags=["team_predictions"])
 
 @router.post("/predict")
 async def get_team_predictions(request: TeamsRequest):
     try:
-        data_team1 = TeamDataProcessor(
-            team_name=request.team_1,
-            opponent_name=request.team_2,
-            league_name=request.league
-        )
-        data_team2 = TeamDataProcessor(
-            team_name=request.team_2,
-            opponent_name=request.team_1,
-            league_name=request.league
+        # Both sides read the same recent-match data, so load it once
+        context = MatchupContext(request.team_1, request.team_2, request.league)
+        data_team1, data_team2 = await asyncio.gather(
+            TeamDataProcessor(
+                team_name=request.team_1,
+                opponent_name=request.team_2,
+                league_name=request.league,
+                context=context
+            ).load(),
+            TeamDataProcessor(
+                team_name=request.team_2,
+                opponent_name=request.team_1,
+                league_name=request.league,
+                context=context
+            ).load()
         )
 
+        await predict_batch([data_team1, data_team2])
         predictions = {
-            request.team_1: {
-                "shots": data_team1.train_shots_model(),
-                "possession": data_team1.train_possession_model(),
-                "passes": data_team1.train_passes_model(),
-                "fouls": data_team1.train_fouls_model()
-            },
-            request.team_2: {
-                "shots": data_team2.train_shots_model(),
-                "possession": data_team2.train_possession_model(),
-                "passes": data_team2.train_passes_model(),
-                "fouls": data_team2.train_fouls_model()
-            }
+            request.team_1: data_team1.predict_all(),
+            request.team_2: data_team2.predict_all()
         }
 
         return predictions
 
+    except (ModelPoolBusy, FeatureWindowExceeded):
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def get_batch_team_predictions(request: TeamsBatchRequest):
+    """Stream one JSON line per matchup, in completion order."""
+    async def stream():
+        async for index, result in predict_matchups(request.matchups):
+            matchup = request.matchups[index]
+            line = {
+                "index": index,
+                "team_1": matchup.team_1,
+                "team_2": matchup.team_2,
+                "league": matchup.league
+            }
+            if isinstance(result, str):
+                line["error"] = result
+            else:
+                line["predictions"] = result
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
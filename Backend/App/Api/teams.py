@@ -1,12 +1,14 @@
 from fastapi import APIRouter
-from Backend.App.Utils.fetch_data import H2H_stats, latest_H2H, recent_matches
-from Backend.App.Models.models import TeamsRequest
+from Backend.App.Utils.fetch_data import H2H_stats, latest_H2H, league_H2H, recent_matches
+from Backend.App.Models.models import LeagueRequest, TeamRequest, TeamsRequest
+from Backend.App.Ml_Models.feature_store import feature_store
+from Backend.App.Ml_Models.matchup_context import resolve_team_id
 
 router = APIRouter(prefix="/teams", tags=["teams"])
 
 @router.post("/h2h")
 async def get_h2h(request: TeamsRequest):
-    return H2H_stats(
+    return await H2H_stats(
         request.team_1, 
         request.team_2, 
         request.league
@@ -14,17 +16,36 @@ async def get_h2h(request: TeamsRequest):
 
 @router.post("/h2h/latest")
 async def get_latest_h2h(request: TeamsRequest):
-    return latest_H2H(
+    return await latest_H2H(
         request.team_1, 
         request.team_2, 
         request.league
     )
 
+@router.post("/h2h/league")
+async def get_league_h2h(request: LeagueRequest):
+    return await league_H2H(
+        request.league,
+        request.seasons
+    )
+
 @router.post("/recent")
 async def get_recent_matches(request: TeamsRequest):
-    return recent_matches(
+    return await recent_matches(
         request.team_1, 
         request.team_2, 
         request.league, 
         3
-    )
\ No newline at end of file
+    )
+
+@router.post("/form")
+async def get_team_form(request: TeamRequest):
+    """Rolling sums, means and EWMA of the team's recent match statistics.
+
+    The aggregates cover at most the last FEATURE_WINDOW finished matches
+    (5 by default), fewer early in the season.
+    """
+    team_id = await resolve_team_id(request.team_name, request.league)
+    if isinstance(team_id, dict):
+        return team_id
+    return await feature_store.team_form(team_id, request.team_name)
@@ -0,0 +1,113 @@
+import numpy as np
+from xgboost import XGBRegressor
+
+from .registry import model_registry
+from ..Utils.tracing import traced
+
+
+def to_number(value):
+    """Convert an api-sports stat value ("55%", "12", None, 7) to a float."""
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+        return float(value) if value else 0.0
+    return float(value or 0)
+
+
+@traced("model.features")
+def feature_matrix(rows, columns):
+    """Build a float matrix with one row per match from dicts of stat values."""
+    return np.array(
+        [[to_number(row[column]) for column in columns] for row in rows],
+        dtype=float
+    ).reshape(-1, len(columns))
+
+
+def fit_linear(X, y):
+    """Ordinary least squares with an intercept, equivalent to sklearn's LinearRegression."""
+    x_mean = X.mean(axis=0)
+    y_mean = y.mean(axis=0)
+    coef, *_ = np.linalg.lstsq(X - x_mean, y - y_mean, rcond=None)
+    return coef, y_mean - x_mean @ coef
+
+
+def target_features(target_col, feature_set, feature_sets, prefix):
+    """Feature columns for a target: the registry's when pretrained, else its set minus the target."""
+    pretrained = model_registry.get(f"{prefix}.{target_col}")
+    if pretrained is not None:
+        return pretrained[1]
+    return [c for c in feature_sets[feature_set] if c != target_col]
+
+
+@traced("model.predict")
+def predict_latest(matrices, columns, targets, feature_sets, prefix):
+    """Predict every target for the newest match of each entity in one pass.
+
+    `matrices` holds one feature matrix per entity (rows are matches, newest
+    first, columns as in `columns`). Returns one {target: {"actual", "predicted"}}
+    dict per entity; a target is None when there isn't enough data for it.
+    """
+    column_index = {c: i for i, c in enumerate(columns)}
+    results = [{target: None for target in targets} for _ in matrices]
+
+    # The newest match of every entity is the row that gets predicted
+    present = [i for i, m in enumerate(matrices) if m.shape[0] > 0]
+    if not present:
+        return results
+    newest = np.vstack([matrices[i][0] for i in present])
+
+    linear_targets = []
+    for target_col, (feature_set, model_type) in targets.items():
+        target_idx = column_index[target_col]
+        feature_idx = [column_index[c] for c in target_features(target_col, feature_set, feature_sets, prefix)]
+        pretrained = model_registry.get(f"{prefix}.{target_col}")
+
+        if pretrained is not None:
+            model = pretrained[0]
+            if hasattr(model, "coef_"):
+                linear_targets.append((target_col, target_idx, feature_idx, model))
+                continue
+            predicted = model.predict(newest[:, feature_idx])
+            for row, i in enumerate(present):
+                results[i][target_col] = (newest[row, target_idx], predicted[row])
+            continue
+
+        # No pretrained model: fit one per entity on its older matches
+        for row, i in enumerate(present):
+            matrix = matrices[i]
+            if matrix.shape[0] < 2:
+                continue
+
+            X_train = matrix[1:, feature_idx]
+            y_train = matrix[1:, target_idx]
+            if model_type == 'linear':
+                coef, intercept = fit_linear(X_train, y_train)
+                predicted = newest[row, feature_idx] @ coef + intercept
+            else:
+                model = XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
+                model.fit(X_train, y_train)
+                predicted = model.predict(newest[row:row + 1, feature_idx])[0]
+            results[i][target_col] = (newest[row, target_idx], predicted)
+
+    # Pretrained linear targets for every entity reduce to a single matrix product
+    if linear_targets:
+        weights = np.zeros((len(columns), len(linear_targets)))
+        intercepts = np.zeros(len(linear_targets))
+        for k, (_, _, feature_idx, model) in enumerate(linear_targets):
+            weights[feature_idx, k] = model.coef_
+            intercepts[k] = model.intercept_
+        predicted = newest @ weights + intercepts
+
+        for k, (target_col, target_idx, _, _) in enumerate(linear_targets):
+            for row, i in enumerate(present):
+                results[i][target_col] = (newest[row, target_idx], predicted[row, k])
+
+    for entity in results:
+        for target_col, value in entity.items():
+            if value is not None:
+                actual, predicted = value
+                entity[target_col] = {
+                    "actual": int(actual),
+                    "predicted": round(float(predicted))
+                }
+
+    return results
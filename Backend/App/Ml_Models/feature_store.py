@@ -0,0 +1,278 @@
+"""Rolling windows of recent-match feature vectors, per team and per player.
+
+The prediction processors used to re-list a team's season fixtures and
+re-parse every fixture payload on each request. Here a team's last
+finished fixtures come from the fixture index, and each team or player
+window parses a fixture once, when it first shows up among them. Until a
+new fixture of the team finishes, a request reads its feature matrix
+without any upstream call.
+
+Windows hold the last FEATURE_WINDOW matches and keep the window sum and
+an exponentially weighted mean (FEATURE_EWMA_ALPHA) up to date on append.
+Asking for more matches than that raises FeatureWindowExceeded, which the
+API answers with a 422, rather than quietly returning fewer.
+"""
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from ..Utils.fetch_data import build_match_info, fixture_statistics, fixture_player_index, player_match_stats, from_warehouse
+from ..Utils.fixture_index import fixture_index
+from ..Utils.http_client import gather_bounded
+from ..Utils.ids import get_season_year
+from ..Utils.tracing import traced
+from ..Utils.warehouse import warehouse
+from .engine import to_number
+
+# Columns of the team feature vectors
+TEAM_COLUMNS = [
+    'ball_possession',
+    'passes_total',
+    'passes_accuracy',
+    'fouls',
+    'corners',
+    'shots_total',
+    'shots_on_target',
+    'shots_off_target'
+]
+
+# Columns of the player feature vectors
+PLAYER_COLUMNS = [
+    'minutes_played',
+    'totalshots',
+    'shotsongoal',
+    'passes_total',
+    'passes_accuracy',
+    'dribbles_attempts',
+    'dribbles_success',
+    'goals_total',
+    'assists',
+    'interceptions',
+    'fouls_committed',
+    'tackles_total'
+]
+
+
+def match_row(m):
+    """Every player feature column of one match, from player_match_stats output."""
+    return {
+        'minutes_played': m['games']['minutes_played'] or 0,
+        # Goalkeeper records have no shot or scoring fields
+        'totalshots': m['goals'].get('totalshots') or 0,
+        'shotsongoal': m['goals'].get('shotsongoal') or 0,
+        'passes_total': m['passes']['total'] or 0,
+        'passes_accuracy': int(m['passes']['accuracy']) if m['passes']['accuracy'] else 0,
+        'dribbles_attempts': m['dribbles']['attempts'] or 0,
+        'dribbles_success': m['dribbles']['success'] or 0,
+        'goals_total': m['goals'].get('total') or 0,
+        'assists': m['goals'].get('assists') or 0,
+        'interceptions': m['tackles']['interceptions'] or 0,
+        'fouls_committed': m['fouls']['committed'] or 0,
+        'tackles_total': m['tackles']['total'] or 0
+    }
+
+
+def vector(row, columns):
+    return np.array([to_number(row[column]) for column in columns], dtype=float)
+
+
+class FeatureWindowExceeded(Exception):
+    """Raised when more matches are asked for than the windows hold (FEATURE_WINDOW)."""
+
+
+class RollingWindow:
+    """The last `capacity` matches of one team or player, with running aggregates.
+
+    Rows are kept in a ring buffer; an append overwrites the oldest row
+    once the window is full and updates the sum and EWMA in O(columns).
+    `synced_through` is the date of the newest fixture the window has
+    consumed, whether or not it added a row for it.
+    """
+
+    def __init__(self, columns, capacity, alpha):
+        self.columns = columns
+        self.capacity = capacity
+        self.alpha = alpha
+        self.synced_through = ""
+        self.count = 0
+        self.sums = np.zeros(len(columns))
+        self.ewma = None
+        self._rows = np.zeros((capacity, len(columns)))
+        self._fixture_ids = [None] * capacity
+        self._next = 0
+
+    def append(self, fixture_id, row):
+        if self.count == self.capacity:
+            self.sums -= self._rows[self._next]
+        else:
+            self.count += 1
+        self._rows[self._next] = row
+        self._fixture_ids[self._next] = fixture_id
+        self._next = (self._next + 1) % self.capacity
+
+        self.sums += row
+        self.ewma = row.copy() if self.ewma is None else self.alpha * row + (1 - self.alpha) * self.ewma
+
+    def matrix(self, number_matches=None, fixture_ids=None):
+        """Feature matrix newest first: the last `number_matches` rows, or the rows of `fixture_ids`."""
+        slots = [(self._next - 1 - i) % self.capacity for i in range(self.count)]
+        if fixture_ids is not None:
+            slots = [slot for slot in slots if self._fixture_ids[slot] in fixture_ids]
+        return self._rows[slots[:number_matches]]
+
+    def aggregates(self):
+        def by_column(values):
+            return {column: round(float(value), 3) for column, value in zip(self.columns, values)}
+
+        return {
+            "matches": self.count,
+            "sum": by_column(self.sums),
+            "mean": by_column(self.sums / self.count) if self.count else None,
+            "ewma": by_column(self.ewma) if self.ewma is not None else None
+        }
+
+
+class FeatureStore:
+    def __init__(self, capacity, alpha, max_entries):
+        self.capacity = capacity
+        self.alpha = alpha
+        self.max_entries = max_entries
+        # ("team", team_id, season) or ("player", player_id, team_id, season) -> RollingWindow
+        self._windows = OrderedDict()
+        self.stats = {
+            "appended": 0
+        }
+
+    def _remember(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _window(self, key, columns):
+        window = self._windows.get(key)
+        if window is None:
+            window = RollingWindow(columns, self.capacity, self.alpha)
+        self._remember(self._windows, key, window)
+        return window
+
+    def _check(self, number_matches):
+        if number_matches > self.capacity:
+            raise FeatureWindowExceeded(
+                f"number_matches is {number_matches}, but at most {self.capacity} are kept (FEATURE_WINDOW)"
+            )
+
+    async def team_log(self, team_id, team_name, season=None):
+        """The team's last finished fixtures of the season, newest first, or an error dict."""
+        season = season or get_season_year()
+        if not from_warehouse():
+            return await fixture_index.last_finished(team_id, team_name, season, self.capacity)
+
+        matches = warehouse.team_fixtures(team_id, season, self.capacity)
+        if not matches:
+            return {"error_code": 404, "message": f"No matches found for {team_name}"}
+        return matches
+
+    @staticmethod
+    def _unseen(window, matches):
+        """Fixtures of a log the window hasn't consumed, oldest first."""
+        return [m for m in reversed(matches) if m["fixture"]["date"] > window.synced_through]
+
+    async def team_window(self, team_id, team_name, season=None):
+        """The team's window, with every fixture of its log appended, or an error dict."""
+        season = season or get_season_year()
+        matches = await self.team_log(team_id, team_name, season)
+        if isinstance(matches, dict):
+            return matches
+
+        window = self._window(("team", team_id, season), TEAM_COLUMNS)
+        new = self._unseen(window, matches)
+        if from_warehouse():
+            stats = [warehouse.fixture_payload(m["fixture"]["id"], "statistics") for m in new]
+        else:
+            stats = await gather_bounded(fixture_statistics(m["fixture"]["id"]) for m in new)
+
+        for match, stats_data in zip(new, stats):
+            if "error_code" in stats_data:
+                return stats_data
+            if not stats_data.get("response"):
+                return {"error_code": 404, "message": f"No statistics found for match {match['fixture']['id']}"}
+
+        # Checked again now that nothing awaits: a concurrent request may have appended them already
+        for match, stats_data in zip(new, stats):
+            if match["fixture"]["date"] > window.synced_through:
+                stats_row = build_match_info(match, stats_data, team_id)["stats"]
+                window.append(match["fixture"]["id"], vector(stats_row, TEAM_COLUMNS))
+                window.synced_through = match["fixture"]["date"]
+                self.stats["appended"] += 1
+        return window
+
+    @traced("features.team")
+    async def team_features(self, team_id, team_name, number_matches):
+        """Feature matrix (TEAM_COLUMNS) of the team's last matches, newest first, or an error dict."""
+        self._check(number_matches)
+        window = await self.team_window(team_id, team_name)
+        if isinstance(window, dict):
+            return window
+        return window.matrix(number_matches)
+
+    async def team_form(self, team_id, team_name):
+        """Running aggregates of the team's window, or an error dict."""
+        window = await self.team_window(team_id, team_name)
+        if isinstance(window, dict):
+            return window
+        return window.aggregates()
+
+    @traced("features.players")
+    async def players_features(self, player_infos, team_id, team_name, number_matches):
+        """Feature matrices (PLAYER_COLUMNS) of several players of a team, or an error dict.
+
+        player_infos are (player_id, name, position) tuples. A player's
+        matrix holds the matches they played among the team's last
+        `number_matches`, newest first, like squad_recent_matches.
+        """
+        self._check(number_matches)
+        season = get_season_year()
+        matches = await self.team_log(team_id, team_name, season)
+        if isinstance(matches, dict):
+            return matches
+
+        windows = [self._window(("player", player_id, team_id, season), PLAYER_COLUMNS) for player_id, _, _ in player_infos]
+        # Every fixture some player still has to consume, indexed once for all of them
+        new = {m["fixture"]["id"]: m for window in windows for m in self._unseen(window, matches)}
+        indexes = await gather_bounded(fixture_player_index(match_id) for match_id in new)
+        for index in indexes:
+            if "error_code" in index:
+                return index
+        indexes = dict(zip(new, indexes))
+
+        # Unseen again now that nothing awaits: a concurrent request may have consumed some
+        for (player_id, _, position), window in zip(player_infos, windows):
+            for match in self._unseen(window, matches):
+                index = indexes[match["fixture"]["id"]]
+                if player_id in index:
+                    row = match_row(player_match_stats(index[player_id], position))
+                    window.append(match["fixture"]["id"], vector(row, PLAYER_COLUMNS))
+                    self.stats["appended"] += 1
+                window.synced_through = match["fixture"]["date"]
+
+        fixture_ids = {m["fixture"]["id"] for m in matches[:number_matches]}
+        return [window.matrix(fixture_ids=fixture_ids) for window in windows]
+
+    def clear(self):
+        self._windows.clear()
+
+    def info(self):
+        return {
+            "window": self.capacity,
+            "windows": len(self._windows),
+            **self.stats
+        }
+
+
+feature_store = FeatureStore(
+    capacity=int(os.getenv("FEATURE_WINDOW", "5")),
+    alpha=float(os.getenv("FEATURE_EWMA_ALPHA", "0.3")),
+    max_entries=int(os.getenv("FEATURE_STORE_SIZE", "4096"))
+)
@@ -0,0 +1,51 @@
+import asyncio
+
+from ..Utils.fetch_data import from_warehouse
+from ..Utils.ids import get_team_id, get_season_year
+from ..Utils.warehouse import warehouse
+from .feature_store import feature_store
+
+
+async def resolve_team_id(team_name, league_name):
+    """ID of a team of a league, from the warehouse or the API, or an error dict."""
+    if from_warehouse():
+        team_id = warehouse.get_team_id(team_name, league_name, get_season_year())
+    else:
+        team_id = await get_team_id(team_name, league_name)
+    if not team_id or isinstance(team_id, dict):
+        return {"error_code": 404, "message": f"Team not found: {team_name}"}
+    return team_id
+
+
+class MatchupContext:
+    """Data for one matchup, shared by both sides' processors.
+
+    Each team's feature matrix is read lazily on first use and at most
+    once, however many processors ask for it. Contexts created with the
+    same `shared` dict (e.g. all matchups of a batch) also share it.
+    """
+
+    def __init__(self, team_1, team_2, league_name, number_matches=5, shared=None):
+        self.team_1 = team_1
+        self.team_2 = team_2
+        self.league_name = league_name
+        self.number_matches = number_matches
+        self._tasks = shared if shared is not None else {}
+
+    def _load(self, key, factory):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+        return task
+
+    async def _fetch_team_features(self, team_name):
+        team_id = await resolve_team_id(team_name, self.league_name)
+        if isinstance(team_id, dict):
+            return team_id
+        return await feature_store.team_features(team_id, team_name, self.number_matches)
+
+    async def team_features(self, team_name):
+        """Feature matrix of the recent matches of one team of the matchup, from the feature store."""
+        key = ("features", self.league_name, team_name, self.number_matches)
+        return await self._load(key, lambda: self._fetch_team_features(team_name))
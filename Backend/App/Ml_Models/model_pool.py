@@ -0,0 +1,161 @@
+"""Worker processes for model fitting and inference, off the event loop.
+
+An XGBoost fit inside an async handler blocks every other request of the
+worker, so the prediction endpoints hand their CPU work to a pool of
+processes, each with xgboost imported and the pretrained models loaded
+ahead of the first request. Each worker's native thread pools (OpenMP,
+BLAS) are capped at MODEL_THREADS, so workers x threads fits the cores
+instead of every fit trying to use all of them.
+
+Once MODEL_QUEUE_LIMIT tasks are queued or running, further work is
+refused with ModelPoolBusy, which the API answers with a 429. Background
+work (inside rate_limit.background_requests(), e.g. pre-warming) doesn't
+count toward that limit: it runs one task at a time, and only while
+interactive tasks leave a worker free. When the pool isn't started
+(MODEL_WORKERS=0, scripts, training) work runs inline.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..Utils.rate_limit import BACKGROUND, current_priority
+from ..Utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", str(os.cpu_count() or 1)))
+MODEL_THREADS = int(os.getenv("MODEL_THREADS", "1"))
+MODEL_QUEUE_LIMIT = int(os.getenv("MODEL_QUEUE_LIMIT", str(4 * max(MODEL_WORKERS, 1))))
+
+# Native thread pools read these once, when their library is loaded
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+class ModelPoolBusy(Exception):
+    """Raised when the model pool already has MODEL_QUEUE_LIMIT tasks."""
+
+
+def _init_worker(model_version, threads):
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+    # Imported here, after the thread limits are set
+    import xgboost  # noqa: F401
+    from .registry import model_registry
+    from . import engine, player_predictions, team_predictions  # noqa: F401
+
+    model_registry.load(model_version)
+
+
+def _ready():
+    return os.getpid()
+
+
+class ModelPool:
+    def __init__(self, workers, threads, queue_limit):
+        self.workers = workers
+        self.threads = threads
+        self.queue_limit = queue_limit
+        self.model_version = None
+        self._executor = None
+        # Interactive tasks queued or running
+        self._pending = 0
+        self._background_pending = 0
+        self._background_lock = None
+        self._worker_free = None
+        self.stats = {
+            "tasks": 0,
+            "background_tasks": 0,
+            "rejected": 0,
+            "restarts": 0
+        }
+
+    def _create_executor(self):
+        # Spawned, not forked: the parent has an event loop and client threads running
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_version, self.threads)
+        )
+
+    async def start(self, model_version=None):
+        """Start the workers and wait until each has its models loaded."""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self.model_version = model_version
+        self._executor = self._create_executor()
+        self._background_lock = asyncio.Lock()
+        self._worker_free = asyncio.Event()
+        self._worker_free.set()
+
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ready) for _ in range(self.workers)))
+        logger.info("Model pool started with %d workers: %s", len(set(pids)), sorted(set(pids)))
+
+    async def stop(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def run(self, func, *args):
+        """Run func(*args) in a worker; func and its arguments must be picklable."""
+        if self._executor is None:
+            return func(*args)
+        if current_priority() == BACKGROUND:
+            return await self._run_background(func, *args)
+        if self._pending >= self.queue_limit:
+            self.stats["rejected"] += 1
+            raise ModelPoolBusy("Too many predictions in progress, try again later")
+
+        self._pending += 1
+        if self._pending >= self.workers:
+            self._worker_free.clear()
+        self.stats["tasks"] += 1
+        try:
+            return await self._submit(func, *args)
+        finally:
+            self._pending -= 1
+            if self._pending < self.workers:
+                self._worker_free.set()
+
+    async def _run_background(self, func, *args):
+        """Run background work one task at a time, each once interactive tasks leave a worker free."""
+        async with self._background_lock:
+            await self._worker_free.wait()
+            self._background_pending += 1
+            self.stats["background_tasks"] += 1
+            try:
+                return await self._submit(func, *args)
+            finally:
+                self._background_pending -= 1
+
+    async def _submit(self, func, *args):
+        executor = self._executor
+        try:
+            with span("model.pool"):
+                return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): replace the pool for later requests
+            if self._executor is executor:
+                logger.exception("Model pool broken, restarting it")
+                executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+                self.stats["restarts"] += 1
+            raise
+
+    def info(self):
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "threads_per_worker": self.threads,
+            "queue_limit": self.queue_limit,
+            "pending": self._pending,
+            "background_pending": self._background_pending,
+            **self.stats
+        }
+
+
+model_pool = ModelPool(MODEL_WORKERS, MODEL_THREADS, MODEL_QUEUE_LIMIT)
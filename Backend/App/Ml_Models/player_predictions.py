@@ -1,126 +1,175 @@
 import pandas as pd
-from xgboost import XGBRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
 
-from ..Utils.fetch_data import player_season_stats, player_recent_matches
+from ..Utils.fetch_data import resolve_players, team_squad
 from ..Utils.ids import get_season_year
+from ..Utils.tracing import traced
 from ..Models.models import PlayerRequest
+from .engine import feature_matrix, predict_latest
+from .feature_store import feature_store, match_row, PLAYER_COLUMNS
+from .prediction_cache import prediction_cache
+
+# Columns of the player feature matrix, as kept by the feature store
+FEATURE_COLUMNS = PLAYER_COLUMNS
+COLUMN_INDEX = {c: i for i, c in enumerate(FEATURE_COLUMNS)}
+
+# Columns of each prepare_*_df frame, targets included
+FEATURE_SETS = {
+    'goals': ['minutes_played', 'totalshots', 'shotsongoal', 'passes_total',
+              'dribbles_attempts', 'dribbles_success', 'goals_total'],
+    'assists': ['minutes_played', 'passes_total', 'passes_accuracy', 'dribbles_attempts',
+                'dribbles_success', 'totalshots', 'assists'],
+    'dribbles': ['dribbles_attempts', 'minutes_played', 'totalshots', 'passes_total',
+                 'passes_accuracy', 'dribbles_success'],
+    'passes': ['minutes_played', 'passes_accuracy', 'dribbles_attempts', 'totalshots',
+               'dribbles_success', 'passes_total'],
+    'tackles': ['minutes_played', 'interceptions', 'dribbles_attempts', 'dribbles_success',
+                'fouls_committed', 'tackles_total']
+}
+
+
+async def predict_squad(team_name, league_name, number_matches=5):
+    """Predict every player target for a whole squad.
+
+    The squad and each of the team's recent fixtures are fetched once, the
+    players' feature matrices come from the feature store, and inference
+    runs as one batch over all players. Returns a list of
+    {"player_id", "name", "position", "goals", ...} dicts, with None for
+    targets a player hasn't enough matches for, or an error dict.
+    Goalkeepers are listed with every target None: the models are trained
+    on outfield players only.
+    """
+    season = get_season_year()
+    squad = await team_squad(team_name, league_name, season)
+    if isinstance(squad, dict):
+        return squad
+    team_id, players = squad
+
+    outfield = [player for player in players if player[2] != "Goalkeeper"]
+    matrices = await feature_store.players_features(outfield, team_id, team_name, number_matches)
+    if isinstance(matrices, dict):
+        return matrices
+
+    targets = PlayerDataProcessor.TARGETS
+    predicted = await prediction_cache.predict_latest(matrices, FEATURE_COLUMNS, targets, FEATURE_SETS, 'player')
+    by_player = {player[0]: prediction for player, prediction in zip(outfield, predicted)}
+    predictions = [by_player.get(player_id, dict.fromkeys(targets)) for player_id, _, _ in players]
+
+    return [
+        {
+            "player_id": player_id,
+            "name": name,
+            "position": position,
+            **{feature_set: predicted[target] for target, (feature_set, _) in targets.items()}
+        }
+        for (player_id, name, position), predicted in zip(players, predictions)
+    ]
+
 
 class PlayerDataProcessor:
+    # target column -> (feature set, which is also its key in prediction responses, model type)
+    TARGETS = {
+        'goals_total': ('goals', 'xgb'),
+        'assists': ('assists', 'xgb'),
+        'dribbles_success': ('dribbles', 'xgb'),
+        'passes_total': ('passes', 'linear'),
+        'tackles_total': ('tackles', 'linear')
+    }
+
     def __init__(self, player_info: PlayerRequest):
         self.player_info = player_info
-        self.recent_matches = player_recent_matches(
-            player_info.player_name,
-            player_info.team_name,
-            player_info.league_name,
-            5,
+        self.recent_matches = None
+        self.position = None
+        self._features = None
+
+    async def load(self):
+        """Read the feature matrix of the player's recent matches from the feature store."""
+        player_name = self.player_info.player_name
+        resolved = await resolve_players(
+            [player_name],
+            self.player_info.team_name,
+            self.player_info.league_name,
             get_season_year()
         )
-
-    def _train_model(self, df, target_col, model_type='xgb'):
-        x = df.drop(columns=[target_col])
-        y = df[target_col]
-
-        if df.shape[0] < 2:
-            return None
-
-        # Use the first sample as a test case
-        X_test = x.iloc[:1]
-        y_test = y.iloc[:1]
-        X_train = x.iloc[1:]
-        y_train = y.iloc[1:]
-
-        if model_type == 'linear':
-            model = LinearRegression()
-        else:
-            model = XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
-
-        model.fit(X_train, y_train)
-
-        y_pred = model.predict(X_test)
-        mse = mean_squared_error(y_test, y_pred)
-
-        # Create a single prediction dictionary
-        predictions = {
-            "0": {
-                "actual": int(y_test.values[0]),
-                "predicted": round(float(y_pred[0]))
-            }
-        }
-
-        return predictions
+        if isinstance(resolved, dict):
+            raise ValueError(resolved.get("message"))
+        team_id, players = resolved
+        if isinstance(players[player_name], dict):
+            raise ValueError(players[player_name].get("message"))
+
+        self.position = players[player_name][2]
+        if self.position == "Goalkeeper":
+            # Never predicted, see predict()
+            return self
+
+        features = await feature_store.players_features([players[player_name]], team_id, self.player_info.team_name, 5)
+        if isinstance(features, dict):
+            raise ValueError(features.get("message"))
+        self._features = features[0]
+        return self
+
+    @property
+    def features(self):
+        """Feature matrix of the player's recent matches, newest first.
+
+        Built from `recent_matches` when the processor wasn't loaded (training).
+        """
+        if self._features is None:
+            self._features = feature_matrix([match_row(m) for m in self.recent_matches], FEATURE_COLUMNS)
+        return self._features
+
+    def format_predictions(self, predictions):
+        """Key per-target predictions by feature set, the way the API returns them."""
+        return {feature_set: predictions[target_col] for target_col, (feature_set, _) in self.TARGETS.items()}
+
+    def predict_all(self):
+        """Predict every player target in one pass over the feature matrix."""
+        predictions = predict_latest([self.features], FEATURE_COLUMNS, self.TARGETS, FEATURE_SETS, 'player')[0]
+        return self.format_predictions(predictions)
+
+    async def predict(self):
+        """predict_all, run in the model pool unless these recent matches were predicted before.
+
+        Goalkeepers get every target None, as in predict_squad.
+        """
+        if self.position == "Goalkeeper":
+            return self.format_predictions(dict.fromkeys(self.TARGETS))
+        predictions = await prediction_cache.predict_latest([self.features], FEATURE_COLUMNS, self.TARGETS, FEATURE_SETS, 'player')
+        return self.format_predictions(predictions[0])
+
+    def target_frame(self, target_col):
+        return self.feature_frame(self.TARGETS[target_col][0])
+
+    @traced("model.features")
+    def feature_frame(self, feature_set):
+        columns = FEATURE_SETS[feature_set]
+        return pd.DataFrame(self.features[:, [COLUMN_INDEX[c] for c in columns]], columns=columns)
 
     def prepare_goals_df(self):
-        return pd.DataFrame([{
-            'minutes_played': m['games']['minutes_played'] or 0,
-            'totalshots': m['goals']['totalshots'] or 0,
-            'shotsongoal': m['goals']['shotsongoal'] or 0,
-            'passes_total': m['passes']['total'] or 0,
-            'dribbles_attempts': m['dribbles']['attempts'] or 0,
-            'dribbles_success': m['dribbles']['success'] or 0,
-            'goals_total': m['goals']['total'] or 0
-        } for m in self.recent_matches])
+        return self.feature_frame('goals')
 
     def prepare_assists_df(self):
-        return pd.DataFrame([{
-            'minutes_played': m['games']['minutes_played'] or 0,
-            'passes_total': m['passes']['total'] or 0,
-            'passes_accuracy': int(m['passes']['accuracy']) if m['passes']['accuracy'] else 0,
-            'dribbles_attempts': m['dribbles']['attempts'] or 0,
-            'dribbles_success': m['dribbles']['success'] or 0,
-            'totalshots': m['goals']['totalshots'] or 0,
-            'assists': m['goals']['assists'] or 0
-        } for m in self.recent_matches])
+        return self.feature_frame('assists')
 
     def prepare_dribbles_df(self):
-        return pd.DataFrame([{
-            'dribbles_attempts': m['dribbles']['attempts'] or 0,
-            'minutes_played': m['games']['minutes_played'] or 0,
-            'totalshots': m['goals']['totalshots'] or 0,
-            'passes_total': m['passes']['total'] or 0,
-            'passes_accuracy': int(m['passes']['accuracy']) if m['passes']['accuracy'] else 0,
-            'dribbles_success': m['dribbles']['success'] or 0
-        } for m in self.recent_matches])
+        return self.feature_frame('dribbles')
 
     def prepare_passes_df(self):
-        return pd.DataFrame([{
-            'minutes_played': m['games']['minutes_played'] or 0,
-            'passes_accuracy': int(m['passes']['accuracy']) if m['passes']['accuracy'] else 0,
-            'dribbles_attempts': m['dribbles']['attempts'] or 0,
-            'totalshots': m['goals']['totalshots'] or 0,
-            'dribbles_success': m['dribbles']['success'] or 0,
-            'passes_total': m['passes']['total'] or 0
-        } for m in self.recent_matches])
+        return self.feature_frame('passes')
 
     def prepare_tackles_df(self):
-        return pd.DataFrame([{
-            'minutes_played': m['games']['minutes_played'] or 0,
-            'interceptions': m['tackles']['interceptions'] or 0,
-            'dribbles_attempts': m['dribbles']['attempts'] or 0,
-            'dribbles_success': m['dribbles']['success'] or 0,
-            'fouls_committed': m['fouls']['committed'] or 0,
-            'tackles_total': m['tackles']['total'] or 0
-        } for m in self.recent_matches])
-    
+        return self.feature_frame('tackles')
+
     def train_goals_model(self):
-        df = self.prepare_goals_df()
-        return self._train_model(df, target_col='goals_total', model_type='xgb')
+        return self.predict_all()['goals']
 
     def train_assists_model(self):
-        df = self.prepare_assists_df()
-        return self._train_model(df, target_col='assists', model_type='xgb')
+        return self.predict_all()['assists']
 
     def train_dribbles_model(self):
-        df = self.prepare_dribbles_df()
-        return self._train_model(df, target_col='dribbles_success', model_type='xgb')
+        return self.predict_all()['dribbles']
 
-    # Use Linear Regression (more linear)
     def train_passes_model(self):
-        df = self.prepare_passes_df()
-        return self._train_model(df, target_col='passes_total', model_type='linear')
+        return self.predict_all()['passes']
 
     def train_tackles_model(self):
-        df = self.prepare_tackles_df()
-        return self._train_model(df, target_col='tackles_total', model_type='linear')
\ No newline at end of file
+        return self.predict_all()['tackles']
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+
+from ..Utils.rate_limit import INTERACTIVE, current_priority
+from .engine import predict_latest
+from .model_pool import model_pool
+from .registry import model_registry
+
+
+class PredictionCache:
+    """LRU cache of model outputs, keyed on the exact inputs that produced them.
+
+    Predictions are deterministic given an entity's recent-match feature
+    matrix and the model version, so the key is a digest of that matrix.
+    Finished fixtures don't change, so a key only goes stale when a new
+    finished fixture enters the window, and then the window (and key) is a
+    new one; nothing needs to be invalidated by hand. Loading a new model
+    version changes every key the same way.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # key -> (pool task computing it, its position in the task's results, its priority)
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(kind, matrix):
+        digest = hashlib.sha1(matrix.tobytes()).hexdigest()
+        return kind, model_registry.version, matrix.shape, digest
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def predict_latest(self, matrices, columns, targets, feature_sets, prefix):
+        """engine.predict_latest, computing only the entities missing from the cache, in the model pool.
+
+        Entities already being computed for a concurrent call are awaited
+        rather than computed again, except that interactive calls don't wait
+        on background work, which the model pool holds back behind them.
+        """
+        priority = current_priority()
+        keys = [self.make_key(prefix, matrix) for matrix in matrices]
+        results = [self.get(key) for key in keys]
+
+        # Entities to await: index -> (task computing it, position in its results),
+        # or None for a repeat of an entity computed by this call
+        waiting = {}
+        # key -> index of the first entity computed by this call
+        missing = {}
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                continue
+            flight = self._in_flight.get(key)
+            if flight is not None and (flight[2] == INTERACTIVE or priority != INTERACTIVE):
+                waiting[i] = flight[:2]
+                self.coalesced += 1
+            elif key in missing:
+                waiting[i] = None
+            else:
+                missing[key] = i
+
+        if missing:
+            task = asyncio.ensure_future(model_pool.run(
+                predict_latest, [matrices[i] for i in missing.values()], columns, targets, feature_sets, prefix
+            ))
+            for position, key in enumerate(missing):
+                self._in_flight[key] = (task, position, priority)
+            try:
+                # Shielded so a cancelled caller doesn't cancel it for the others
+                predicted = await asyncio.shield(task)
+            finally:
+                for key in missing:
+                    if self._in_flight.get(key, (None,))[0] is task:
+                        del self._in_flight[key]
+            for (key, i), prediction in zip(missing.items(), predicted):
+                self.set(key, prediction)
+                results[i] = prediction
+
+        for i, flight in waiting.items():
+            if flight is None:
+                results[i] = results[missing[keys[i]]]
+            else:
+                task, position = flight
+                results[i] = (await asyncio.shield(task))[position]
+        return results
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+prediction_cache = PredictionCache(int(os.getenv("PREDICTION_CACHE_SIZE", "4096")))
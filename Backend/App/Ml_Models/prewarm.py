@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import date, timedelta
+
+from ..Utils.fetch_data import LEAGUES, from_warehouse, fixture_player_index
+from ..Utils.http_client import api_get, gather_bounded
+from ..Utils.ids import get_season_year, squad_index
+from ..Utils.rate_limit import background_requests
+from ..Utils.warehouse import warehouse
+from .feature_store import feature_store
+from .player_predictions import FEATURE_COLUMNS as PLAYER_FEATURE_COLUMNS, FEATURE_SETS as PLAYER_FEATURE_SETS, PlayerDataProcessor
+from .prediction_cache import prediction_cache
+from .team_predictions import FEATURE_COLUMNS, FEATURE_SETS, TeamDataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Matches the prediction endpoints are computed from
+NUMBER_MATCHES = 5
+
+
+class PredictionPrewarmer:
+    """Fills the prediction cache for the teams of upcoming fixtures.
+
+    Every run reads the fixtures of the next `horizon_days` in each league
+    of LEAGUES and, for each team playing, predicts the team and every
+    player who started its last match, the same way the endpoints would.
+    The endpoints then find their feature windows and predictions cached
+    when the pre-kickoff burst arrives. Upstream requests go out at
+    background priority and at most `concurrency` teams are warmed at once.
+    """
+
+    def __init__(self, interval, horizon_days, concurrency):
+        self.interval = interval
+        self.horizon_days = horizon_days
+        self.concurrency = concurrency
+        self.last_run = None
+        self._task = None
+
+    async def upcoming_fixtures(self, league_id, season):
+        today = date.today()
+        response = await api_get("/fixtures", params={
+            "league": league_id,
+            "season": season,
+            "from": today.isoformat(),
+            "to": (today + timedelta(days=self.horizon_days)).isoformat(),
+            "status": "NS"  # Not started
+        })
+        if response.status_code != 200:
+            logger.warning("Upcoming fixtures of league %s unavailable: %s", league_id, response.json().get("message"))
+            return []
+        return response.json().get("response", [])
+
+    async def _squad(self, team_id, season):
+        if from_warehouse():
+            return warehouse.squad(team_id, season)
+        index = await squad_index(team_id)
+        return index if isinstance(index, dict) else index.values()
+
+    async def warm_team(self, team_id, team_name, season):
+        """Predict one team and its probable starters; returns the number of players warmed."""
+        features, squad = await asyncio.gather(
+            feature_store.team_features(team_id, team_name, NUMBER_MATCHES),
+            self._squad(team_id, season)
+        )
+        if isinstance(features, dict):
+            return 0
+        await prediction_cache.predict_latest([features], FEATURE_COLUMNS, TeamDataProcessor.TARGETS, FEATURE_SETS, 'team')
+
+        # Listed moments ago by team_features
+        fixtures = await feature_store.team_log(team_id, team_name, season)
+        if isinstance(fixtures, dict) or isinstance(squad, dict):
+            return 0
+        last_match = await fixture_player_index(fixtures[0]["fixture"]["id"])
+        if "error_code" in last_match:
+            return 0
+
+        # Goalkeepers have no player prediction
+        starters = [
+            (player_id, name, position) for player_id, name, position in squad
+            if player_id in last_match and not last_match[player_id]["games"].get("substitute")
+            and position != "Goalkeeper"
+        ]
+        matrices = await feature_store.players_features(starters, team_id, team_name, NUMBER_MATCHES)
+        if isinstance(matrices, dict):
+            return 0
+
+        await prediction_cache.predict_latest(
+            matrices, PLAYER_FEATURE_COLUMNS, PlayerDataProcessor.TARGETS, PLAYER_FEATURE_SETS, 'player'
+        )
+        return len(starters)
+
+    async def run_once(self):
+        season = get_season_year()
+        started = time.monotonic()
+
+        leagues = await asyncio.gather(*(self.upcoming_fixtures(league_id, season) for league_id in LEAGUES.values()))
+        teams = {}
+        for fixtures in leagues:
+            for fixture in fixtures:
+                for side in ("home", "away"):
+                    team = fixture["teams"][side]
+                    teams[team["id"]] = team["name"]
+
+        async def warm(team_id, team_name):
+            try:
+                return await self.warm_team(team_id, team_name, season)
+            except Exception:
+                logger.exception("Pre-warming %s failed", team_name)
+                return None
+
+        results = await gather_bounded(
+            (warm(team_id, team_name) for team_id, team_name in teams.items()),
+            limit=self.concurrency
+        )
+        self.last_run = {
+            "finished_at": time.time(),
+            "duration_seconds": round(time.monotonic() - started, 1),
+            "fixtures": sum(len(fixtures) for fixtures in leagues),
+            "teams": sum(1 for result in results if result is not None),
+            "players": sum(result for result in results if result),
+            "failed_teams": sum(1 for result in results if result is None)
+        }
+        return self.last_run
+
+    async def _run(self):
+        while True:
+            try:
+                with background_requests():
+                    await self.run_once()
+            except Exception:
+                logger.exception("Prediction pre-warming failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def info(self):
+        return {
+            "enabled": self.interval > 0,
+            "interval": self.interval,
+            "horizon_days": self.horizon_days,
+            "last_run": self.last_run
+        }
+
+
+# PREWARM_INTERVAL_SECONDS=0 turns pre-warming off
+prewarmer = PredictionPrewarmer(
+    interval=float(os.getenv("PREWARM_INTERVAL_SECONDS", "3600")),
+    horizon_days=int(os.getenv("PREWARM_HORIZON_DAYS", "2")),
+    concurrency=int(os.getenv("PREWARM_CONCURRENCY", "4"))
+)
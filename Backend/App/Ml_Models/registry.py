@@ -0,0 +1,84 @@
+import json
+import os
+
+import joblib
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
+
+
+class ModelRegistry:
+    """Pretrained models, loaded once from a versioned directory.
+
+    Layout of the model directory:
+        LATEST                  name of the version to load
+        <version>/manifest.json targets, feature columns and training metadata
+        <version>/<target>.joblib
+    """
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR):
+        self.model_dir = model_dir
+        self.version = None
+        self.manifest = {}
+        self._models = {}
+
+    def latest_version(self):
+        try:
+            with open(os.path.join(self.model_dir, "LATEST")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None):
+        """Load every model of a version; returns False if there is nothing to load."""
+        version = version or self.latest_version()
+        if not version:
+            return False
+
+        version_dir = os.path.join(self.model_dir, version)
+        with open(os.path.join(version_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        models = {
+            target: joblib.load(os.path.join(version_dir, spec["file"]))
+            for target, spec in manifest["targets"].items()
+        }
+
+        self.version = version
+        self.manifest = manifest
+        self._models = models
+        return True
+
+    def get(self, target):
+        """Return (model, feature_columns) for a target such as "team.fouls", or None."""
+        model = self._models.get(target)
+        if model is None:
+            return None
+        return model, self.manifest["targets"][target]["features"]
+
+    def save(self, version, models, metadata=None):
+        """Persist {target: (model, feature_columns, info)} as a new version and mark it latest."""
+        version_dir = os.path.join(self.model_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        targets = {}
+        for target, (model, features, info) in models.items():
+            file_name = f"{target}.joblib"
+            joblib.dump(model, os.path.join(version_dir, file_name))
+            targets[target] = {"file": file_name, "features": list(features), **(info or {})}
+
+        manifest = {"version": version, **(metadata or {}), "targets": targets}
+        with open(os.path.join(version_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        with open(os.path.join(self.model_dir, "LATEST"), "w") as f:
+            f.write(version)
+
+        return manifest
+
+    def info(self):
+        return {
+            "version": self.version,
+            "targets": sorted(self._models)
+        }
+
+
+model_registry = ModelRegistry(os.getenv("MODEL_DIR", DEFAULT_MODEL_DIR))
@@ -1,124 +1,180 @@
+import asyncio
+
 import pandas as pd
-from xgboost import XGBRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
 
-from ..Utils.fetch_data import H2H_stats, latest_H2H, recent_matches
-from ..Utils.ids import get_season_year
-from ..Models.models import TeamsRequest
+from .engine import feature_matrix, predict_latest
+from .feature_store import TEAM_COLUMNS
+from .matchup_context import MatchupContext
+from .model_pool import ModelPoolBusy
+from .prediction_cache import prediction_cache
+
+# Columns of the team feature matrix, as kept by the feature store
+FEATURE_COLUMNS = TEAM_COLUMNS
+COLUMN_INDEX = {c: i for i, c in enumerate(FEATURE_COLUMNS)}
+
+# Columns each group of models is trained on, targets included
+FEATURE_SETS = {
+    'shots': ['ball_possession', 'passes_total', 'passes_accuracy', 'fouls', 'corners',
+              'shots_total', 'shots_on_target', 'shots_off_target'],
+    'possession': ['passes_total', 'passes_accuracy', 'shots_total', 'corners', 'ball_possession'],
+    'passes': ['ball_possession', 'shots_total', 'corners', 'passes_total', 'passes_accuracy'],
+    'fouls': ['ball_possession', 'shots_total', 'corners', 'passes_total', 'fouls']
+}
 
 class TeamDataProcessor:
-    def __init__(self, team_name, opponent_name, league_name):
+    # target column -> (feature set, model type)
+    TARGETS = {
+        'shots_total': ('shots', 'xgb'),
+        'shots_on_target': ('shots', 'xgb'),
+        'shots_off_target': ('shots', 'xgb'),
+        'ball_possession': ('possession', 'linear'),
+        'passes_total': ('passes', 'linear'),
+        'passes_accuracy': ('passes', 'linear'),
+        'fouls': ('fouls', 'linear')
+    }
+
+    def __init__(self, team_name, opponent_name, league_name, context=None):
         self.team_name = team_name
         self.opponent_name = opponent_name
         self.league_name = league_name
-        self.h2h_alltime = H2H_stats(
-            team_name, 
-            opponent_name, 
-            league_name
-        )
-        self.h2h_latest = latest_H2H(
-            team_name, 
-            opponent_name, 
-            league_name
-        )
-        self.recent_matches = recent_matches(
-            team_name, 
-            opponent_name, 
-            league_name, 
-            5
-        )
-
-    def _train_model(self, df, target_col, model_type='xgb', label=None):
-        x = df.drop(columns=[target_col])
-        y = df[target_col]
-
-        if df.shape[0] < 2:
-            return None
-
-        # Use the first sample as a test case
-        X_test = x.iloc[:1]
-        y_test = y.iloc[:1]
-        X_train = x.iloc[1:]
-        y_train = y.iloc[1:]
-
-        if model_type == 'linear':
-            model = LinearRegression()
-        else:
-            model = XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
-
-        model.fit(X_train, y_train)
-
-        y_pred = model.predict(X_test)
-        mse = mean_squared_error(y_test, y_pred)
-
-        predictions = {
-            label or "0": {
-                "actual": int(y_test.values[0]),
-                "predicted": round(float(y_pred[0]))
-            }
-        }
-
-        return predictions
+        self.context = context or MatchupContext(team_name, opponent_name, league_name)
+        self.recent_matches = None
+        self._features = None
+        self._predictions = None
+
+    async def load(self):
+        """Read the feature matrix of the team's recent matches from the feature store."""
+        features = await self.context.team_features(self.team_name)
+        if isinstance(features, dict):
+            raise ValueError(features.get("message") or f"No matches found for {self.team_name}")
+
+        self._features = features
+        return self
+
+    @property
+    def features(self):
+        """Feature matrix of the team's recent matches, newest first.
+
+        Built from `recent_matches` when the processor wasn't loaded (training).
+        """
+        if self._features is None:
+            self._features = feature_matrix(
+                (m['stats'] for m in self.recent_matches[self.team_name]),
+                FEATURE_COLUMNS
+            )
+        return self._features
+
+    def feature_frame(self, feature_set):
+        columns = FEATURE_SETS[feature_set]
+        return pd.DataFrame(self.features[:, [COLUMN_INDEX[c] for c in columns]], columns=columns)
+
+    def target_frame(self, target_col):
+        return self.feature_frame(self.TARGETS[target_col][0])
 
     def prepare_shots_df(self):
-        return pd.DataFrame([{
-            'ball_possession': int(m['stats']['ball_possession'].strip('%')),
-            'passes_total': m['stats']['passes_total'],
-            'passes_accuracy': m['stats']['passes_accuracy'],
-            'fouls': m['stats']['fouls'],
-            'corners': m['stats']['corners'],
-            'shots_total': m['stats']['shots_total'],
-            'shots_on_target': m['stats']['shots_on_target'],
-            'shots_off_target': m['stats']['shots_off_target']
-        } for m in self.recent_matches[self.team_name]])
+        return self.feature_frame('shots')
 
     def prepare_possession_df(self):
-        return pd.DataFrame([{
-            'passes_total': m['stats']['passes_total'],
-            'passes_accuracy': m['stats']['passes_accuracy'],
-            'shots_total': m['stats']['shots_total'],
-            'corners': m['stats']['corners'],
-            'ball_possession': int(m['stats']['ball_possession'].strip('%'))
-        } for m in self.recent_matches[self.team_name]])
+        return self.feature_frame('possession')
 
     def prepare_passes_df(self):
-        return pd.DataFrame([{
-            'ball_possession': int(m['stats']['ball_possession'].strip('%')),
-            'shots_total': m['stats']['shots_total'],
-            'corners': m['stats']['corners'],
-            'passes_total': m['stats']['passes_total'],
-            'passes_accuracy': m['stats']['passes_accuracy']
-        } for m in self.recent_matches[self.team_name]])
+        return self.feature_frame('passes')
 
     def prepare_fouls_df(self):
-        return pd.DataFrame([{
-            'ball_possession': int(m['stats']['ball_possession'].strip('%')),
-            'shots_total': m['stats']['shots_total'],
-            'corners': m['stats']['corners'],
-            'passes_total': m['stats']['passes_total'],
-            'fouls': m['stats']['fouls']
-        } for m in self.recent_matches[self.team_name]])
+        return self.feature_frame('fouls')
+
+    def format_predictions(self, predictions):
+        """Group per-target predictions the way the API returns them."""
+        def labelled(target_col):
+            prediction = predictions[target_col]
+            return {self.team_name: prediction} if prediction is not None else None
 
-    def train_shots_model(self):
-        df = self.prepare_shots_df()
         return {
-            'total': self._train_model(df, target_col='shots_total', model_type='xgb', label=self.team_name),
-            'on_target': self._train_model(df, target_col='shots_on_target', model_type='xgb', label=self.team_name),
-            'off_target': self._train_model(df, target_col='shots_off_target', model_type='xgb', label=self.team_name)
+            'shots': {
+                'total': labelled('shots_total'),
+                'on_target': labelled('shots_on_target'),
+                'off_target': labelled('shots_off_target')
+            },
+            'possession': labelled('ball_possession'),
+            'passes': {
+                'total': labelled('passes_total'),
+                'accuracy': labelled('passes_accuracy')
+            },
+            'fouls': labelled('fouls')
         }
 
+    def predict_all(self):
+        """Predict every team target in one pass over the feature matrix."""
+        if self._predictions is None:
+            predictions = predict_latest([self.features], FEATURE_COLUMNS, self.TARGETS, FEATURE_SETS, 'team')[0]
+            self._predictions = self.format_predictions(predictions)
+        return self._predictions
+
+    def train_shots_model(self):
+        return self.predict_all()['shots']
+
     def train_possession_model(self):
-        df = self.prepare_possession_df()
-        return self._train_model(df, target_col='ball_possession', model_type='linear', label=self.team_name)
+        return self.predict_all()['possession']
 
     def train_passes_model(self):
-        df = self.prepare_passes_df()
-        return {
-            'total': self._train_model(df, target_col='passes_total', model_type='linear', label=self.team_name),
-            'accuracy': self._train_model(df, target_col='passes_accuracy', model_type='linear', label=self.team_name)
-        }
+        return self.predict_all()['passes']
 
     def train_fouls_model(self):
-        df = self.prepare_fouls_df()
-        return self._train_model(df, target_col='fouls', model_type='linear', label=self.team_name)
\ No newline at end of file
+        return self.predict_all()['fouls']
+
+
+async def predict_batch(processors):
+    """Predict every target for many loaded processors in one vectorized pass, reusing cached predictions."""
+    pending = [p for p in processors if p._predictions is None]
+    if not pending:
+        return
+
+    predictions = await prediction_cache.predict_latest(
+        [p.features for p in pending], FEATURE_COLUMNS, TeamDataProcessor.TARGETS, FEATURE_SETS, 'team'
+    )
+    for processor, prediction in zip(pending, predictions):
+        processor._predictions = processor.format_predictions(prediction)
+
+
+async def predict_matchups(matchups, number_matches=5):
+    """Yield (index, predictions or error message) for each matchup as soon as it is ready.
+
+    ID resolution and each team's fixtures are fetched once for the whole
+    batch, and the matchups that finish loading together are predicted in
+    a single vectorized pass.
+    """
+    shared = {}
+
+    async def load(index, matchup):
+        context = MatchupContext(matchup.team_1, matchup.team_2, matchup.league, number_matches, shared=shared)
+        try:
+            processors = await asyncio.gather(
+                TeamDataProcessor(matchup.team_1, matchup.team_2, matchup.league, context=context).load(),
+                TeamDataProcessor(matchup.team_2, matchup.team_1, matchup.league, context=context).load()
+            )
+        except Exception as e:
+            return index, None, str(e)
+        return index, processors, None
+
+    pending = {asyncio.ensure_future(load(index, matchup)) for index, matchup in enumerate(matchups)}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            loaded = sorted((task.result() for task in done), key=lambda result: result[0])
+
+            busy = None
+            try:
+                await predict_batch([p for _, processors, _ in loaded if processors for p in processors])
+            except ModelPoolBusy as e:
+                busy = str(e)
+
+            for index, processors, error in loaded:
+                error = error or busy
+                if error is not None:
+                    yield index, error
+                else:
+                    yield index, {p.team_name: p.predict_all() for p in processors}
+    finally:
+        # The client went away mid-stream
+        for task in pending:
+            task.cancel()
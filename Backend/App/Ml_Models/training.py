@@ -0,0 +1,158 @@
+"""Offline training of the team and player models.
+
+Fits one model per target on every finished fixture of the given leagues
+and seasons, then saves them as a new version in the model registry:
+
+    python -m Backend.App.Ml_Models.training --league "Premier League" --league "Serie A" --season 2024
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from xgboost import XGBRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error
+
+from ..Utils.http_client import api_get, gather_bounded, close_client
+from ..Utils.rate_limit import background_requests
+from ..Utils.fetch_data import fixture_statistics, fixture_players, team_match_stats, player_match_stats
+from ..Utils.ids import get_league_id, get_season_year
+from ..Models.models import PlayerRequest
+from .team_predictions import TeamDataProcessor
+from .player_predictions import PlayerDataProcessor
+from .registry import model_registry
+
+
+def build_model(model_type):
+    if model_type == 'linear':
+        return LinearRegression()
+    return XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
+
+
+async def league_fixtures(league_name, season):
+    """Fetch every finished fixture of a league season, newest first."""
+    league_id = await get_league_id(league_name)
+    if not league_id or isinstance(league_id, dict):
+        raise ValueError(f"League not found: {league_name}")
+
+    response = await api_get("/fixtures", params={"league": league_id, "season": season, "status": "FT"})
+    if response.status_code != 200:
+        raise ValueError(f"Error fetching fixtures for {league_name}: {response.json().get('message')}")
+
+    fixtures = response.json().get("response", [])
+    fixtures.sort(key=lambda x: x["fixture"]["date"], reverse=True)
+    return fixtures
+
+
+async def collect_matches(league_name, season, max_fixtures=None):
+    """Return team and player match rows, shaped like recent_matches/player_recent_matches."""
+    fixtures = await league_fixtures(league_name, season)
+    if max_fixtures:
+        fixtures = fixtures[:max_fixtures]
+
+    match_ids = [f["fixture"]["id"] for f in fixtures]
+    stats = await gather_bounded(fixture_statistics(match_id) for match_id in match_ids)
+    players = await gather_bounded(fixture_players(match_id) for match_id in match_ids)
+
+    team_rows = []
+    player_rows = []
+
+    for stats_data in stats:
+        if "error_code" in stats_data:
+            continue
+        for entry in stats_data.get("response", []):
+            match_stats = team_match_stats(entry["statistics"])
+            # Matches without a possession figure can't be used as samples
+            if isinstance(match_stats["ball_possession"], str):
+                team_rows.append({"stats": match_stats})
+
+    for players_data in players:
+        if "error_code" in players_data:
+            continue
+        for team in players_data.get("response", []):
+            for player in team.get("players", []):
+                player_stats = player["statistics"][0]
+                games = player_stats.get("games", {})
+                # Goalkeepers have no outfield targets and unused substitutes have no data
+                if games.get("position") == "G" or not games.get("minutes"):
+                    continue
+                player_rows.append(player_match_stats(player_stats, games.get("position")))
+
+    return team_rows, player_rows
+
+
+def fit_target(df, target_col, model_type):
+    """Fit a model for one target and report its error on a held-out split."""
+    x = df.drop(columns=[target_col])
+    y = df[target_col]
+
+    X_train, X_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=42)
+    model = build_model(model_type).fit(X_train, y_train)
+    mse = mean_squared_error(y_test, model.predict(X_test))
+
+    # The saved model is refit on every sample
+    model = build_model(model_type).fit(x, y)
+    info = {"model_type": model_type, "rows": int(df.shape[0]), "test_mse": round(float(mse), 4)}
+    return model, list(x.columns), info
+
+
+def fit_targets(prefix, processor):
+    models = {}
+    for target_col, (_, model_type) in processor.TARGETS.items():
+        df = processor.target_frame(target_col)
+        if df.shape[0] < 10:
+            print(f"Skipping {prefix}.{target_col}: only {df.shape[0]} samples")
+            continue
+        models[f"{prefix}.{target_col}"] = fit_target(df, target_col, model_type)
+        print(f"Trained {prefix}.{target_col}: {models[f'{prefix}.{target_col}'][2]}")
+    return models
+
+
+async def train(leagues, seasons, version=None, max_fixtures=None):
+    team_rows = []
+    player_rows = []
+    try:
+        with background_requests():
+            for league_name in leagues:
+                for season in seasons:
+                    teams, players = await collect_matches(league_name, season, max_fixtures)
+                    team_rows.extend(teams)
+                    player_rows.extend(players)
+    finally:
+        await close_client()
+
+    # The processors' DataFrame builders keep features identical to inference
+    team_processor = TeamDataProcessor("training", None, None)
+    team_processor.recent_matches = {"training": team_rows}
+    player_processor = PlayerDataProcessor(PlayerRequest(player_name="training", team_name="training", league_name="training"))
+    player_processor.recent_matches = player_rows
+
+    models = {**fit_targets("team", team_processor), **fit_targets("player", player_processor)}
+    if not models:
+        raise ValueError("Not enough data to train any model")
+
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    return model_registry.save(version, models, metadata={
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "leagues": leagues,
+        "seasons": seasons,
+        "team_samples": len(team_rows),
+        "player_samples": len(player_rows)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and persist the prediction models.")
+    parser.add_argument("--league", action="append", required=True, help="League name, may be repeated")
+    parser.add_argument("--season", action="append", type=int, help="Season year, may be repeated (default: current)")
+    parser.add_argument("--version", help="Version name (default: UTC timestamp)")
+    parser.add_argument("--max-fixtures", type=int, help="Only use the most recent fixtures of each league season")
+    args = parser.parse_args()
+
+    manifest = asyncio.run(train(args.league, args.season or [get_season_year()], args.version, args.max_fixtures))
+    print(f"Saved model version {manifest['version']} with {len(manifest['targets'])} targets")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
 class TeamsRequest(BaseModel):
@@ -5,7 +6,22 @@ class TeamsRequest(BaseModel):
     team_2: str
     league: str
 
+class TeamRequest(BaseModel):
+    team_name: str
+    league: str
+
+class LeagueRequest(BaseModel):
+    league: str
+    seasons: Optional[List[int]] = None
+
+class TeamsBatchRequest(BaseModel):
+    matchups: List[TeamsRequest]
+
 class PlayerRequest(BaseModel):
     player_name: str
     team_name: str
-    league_name: str
\ No newline at end of file
+    league_name: str
+
+class SquadRequest(BaseModel):
+    team_name: str
+    league_name: str
@@ -1,147 +1,244 @@
-import requests
-from fuzzywuzzy import process
-from .creds import api_key
+import asyncio
+import os
+from collections import OrderedDict
+
+from .http_client import api_get, gather_bounded
+from .fixture_store import fixture_store, is_finished
+from .fixture_index import fixture_index
+from .ids import get_team_id, get_league_id, get_player_id, get_player_ids, get_season_year, squad_index
+from .warehouse import warehouse
+from .h2h import fixture_table, pair_summaries, empty_summary
+from .stat_schema import TEAM_MATCH_STATS, GOALKEEPER_MATCH_STATS, OUTFIELD_MATCH_STATS
+from .tracing import traced
+
+# "api" queries api-sports; "warehouse" answers from the local warehouse only
+DATA_SOURCE = os.getenv("DATA_SOURCE", "api")
+
+def from_warehouse(source=None):
+    return (source or DATA_SOURCE) == "warehouse"
+
+# Parsed /fixtures/players payloads of finished fixtures, fixture ID -> player index
+PLAYER_INDEX_CACHE_SIZE = int(os.getenv("PLAYER_INDEX_CACHE_SIZE", "512"))
+_player_indexes = OrderedDict()
+
+@traced("fetch.fixture_payload")
+async def fetch_fixture_payload(kind, match_id, finished=True):
+    """Fetch /fixtures/<kind> for a match, serving finished matches from the fixture store."""
+    if finished:
+        cached = fixture_store.get(kind, match_id)
+        if cached is not None:
+            return cached
+
+    response = await api_get(f"/fixtures/{kind}", params={"fixture": match_id})
+    if response.status_code != 200:
+        return {"error_code": response.status_code, "message": response.json().get("message")}
 
-from .ids import get_team_id, get_league_id, get_player_id, get_team_matches, get_season_year
+    data = response.json()
+    # Only complete payloads are stored; an empty response may still be filled in later
+    if finished and data.get("response"):
+        fixture_store.put(kind, match_id, data)
+    return data
+
+async def fixture_statistics(match_id, finished=True):
+    """Fetch team statistics for a single fixture."""
+    return await fetch_fixture_payload("statistics", match_id, finished)
+
+async def fixture_players(match_id, finished=True):
+    """Fetch per-player statistics for a single fixture."""
+    return await fetch_fixture_payload("players", match_id, finished)
+
+# Leagues served by /standings and used for scheduled jobs, name -> api-sports league ID
+LEAGUES = {
+    "Premier League": "39",
+    "LaLiga": "140",
+    "SerieA": "135",
+    "Bundesliga": "78",
+}
 
-BASE_URL = "https://v3.football.api-sports.io"
+@traced("fetch.league_table")
+async def league_table(league_id, season, source=None):
+    """Fetch the standings table of one league, or None if it couldn't be fetched."""
+    if from_warehouse(source):
+        data = warehouse.standings(int(league_id), season)
+        if data is None:
+            return None
+    else:
+        path = "/standings"
+        params = {"league": league_id, "season": f"{season}"}
 
-headers = {
-    "x-rapidapi-key": api_key,
-    "x-rapidapi-host": "v3.football.api-sports.io"
-}
+        response = await api_get(path, params=params)
+        if response.status_code != 200:
+            return None
 
-def league_standings():
-    """Fetch league standings for a specific league and season."""
-    url = f"{BASE_URL}/standings"
+        data = response.json()
+    teams = data.get("response", [])
+    if not teams:
+        return None
 
-    leagues = {
-        "Premier League": {"league": "39", "season": f"{get_season_year()}"},
-        "LaLiga": {"league": "140", "season": f"{get_season_year()}"},
-        "SerieA": {"league": "135", "season": f"{get_season_year()}"},
-        "Bundesliga": {"league": "78", "season": f"{get_season_year()}"},
-    }
+    standings = teams[0]["league"]["standings"][0]
+    
+    return [
+        {
+            "rank": team["rank"],
+            "name": team["team"]["name"],
+            "matches_played": team["all"]["played"],
+            "wins": team["all"]["win"],
+            "draws": team["all"]["draw"],
+            "losses": team["all"]["lose"],
+            "goals_for": team["all"]["goals"]["for"],
+            "goals_against": team["all"]["goals"]["against"],
+            "goal_diff": team["goalsDiff"],
+            "points": team["points"],
+            "last_five": team["form"],
+            "standing": team.get("description", "Regular"),
+        }
+        for team in standings[:20]
+    ]
 
-    all_leagues = {league: {"standings": []} for league in leagues}
+async def league_standings(previous=None):
+    """Fetch the standings of every league in LEAGUES concurrently.
 
-    for league_name, params in leagues.items():
-        response = requests.get(url, headers=headers, params=params)
+    A league whose table couldn't be fetched keeps its table from
+    `previous` (an earlier result), or gets an empty one.
+    """
+    season = get_season_year()
+    tables = await asyncio.gather(*(league_table(league_id, season) for league_id in LEAGUES.values()))
 
-        if response.status_code == 200:
-            data = response.json()
-            teams = data.get("response", [])
-
-            if teams:
-                standings = teams[0]["league"]["standings"][0]
-                
-                all_leagues[league_name]["standings"] = [
-                    {
-                        "rank": team["rank"],
-                        "name": team["team"]["name"],
-                        "matches_played": team["all"]["played"],
-                        "wins": team["all"]["win"],
-                        "draws": team["all"]["draw"],
-                        "losses": team["all"]["lose"],
-                        "goals_for": team["all"]["goals"]["for"],
-                        "goals_against": team["all"]["goals"]["against"],
-                        "goal_diff": team["goalsDiff"],
-                        "points": team["points"],
-                        "last_five": team["form"],
-                        "standing": team.get("description", "Regular"),
-                    }
-                    for team in standings[:20]
-                ]
-
-    return all_leagues
-
-def H2H_stats(team_1, team_2, league):
+    previous = previous or {}
+    return {
+        league_name: {"standings": table if table is not None else previous.get(league_name, {}).get("standings", [])}
+        for league_name, table in zip(LEAGUES, tables)
+    }
+
+@traced("fetch.h2h")
+async def H2H_stats(team_1, team_2, league, source=None):
     """Fetch H2H stats between two teams."""
-    team_1_id = get_team_id(team_1, league)
-    team_2_id = get_team_id(team_2, league)
+    if from_warehouse(source):
+        season = get_season_year()
+        team_1_id = warehouse.get_team_id(team_1, league, season)
+        team_2_id = warehouse.get_team_id(team_2, league, season)
 
-    if not team_1_id or not team_2_id:
-        return {"error_code": 404, "message": "Teams not found"}
+        if isinstance(team_1_id, dict) or isinstance(team_2_id, dict):
+            return {"error_code": 404, "message": "Teams not found"}
 
-    url = f"{BASE_URL}/fixtures/headtohead"
-    params = {"h2h": f"{team_1_id}-{team_2_id}"}
+        fixtures = warehouse.h2h_fixtures(team_1_id, team_2_id)
+    else:
+        team_1_id = await get_team_id(team_1, league)
+        team_2_id = await get_team_id(team_2, league)
 
-    response = requests.get(url, headers=headers, params=params)
-    
-    if response.status_code != 200:
-        return {"error_code": response.status_code, "message": "Error fetching data"}
+        if not team_1_id or not team_2_id:
+            return {"error_code": 404, "message": "Teams not found"}
+        if isinstance(team_1_id, dict):
+            return team_1_id
+        if isinstance(team_2_id, dict):
+            return team_2_id
 
-    data = response.json()
-    fixtures = data.get("response", [])
-
-    stats = {
-        "total_games": len(fixtures),
-        "home_games": 0,
-        "away_games": 0,
-        "wins_team_1": 0,
-        "wins_team_2": 0,
-        "draws": 0
-    }
+        path = "/fixtures/headtohead"
+        params = {"h2h": f"{team_1_id}-{team_2_id}"}
+
+        response = await api_get(path, params=params)
+        
+        if response.status_code != 200:
+            return {"error_code": response.status_code, "message": "Error fetching data"}
+
+        data = response.json()
+        fixtures = data.get("response", [])
+
+    # Unplayed meetings keep counting as draws here, as they always have
+    return pair_summaries(fixture_table(fixtures), finished_only=False).get((team_1_id, team_2_id), empty_summary())
 
-    for match in fixtures:
-        home_team = match["teams"]["home"]["id"]
-        away_team = match["teams"]["away"]["id"]
-        home_winner = match["teams"]["home"]["winner"]
-        away_winner = match["teams"]["away"]["winner"]
-
-        if home_team == team_1_id:
-            stats["home_games"] += 1
-            if home_winner:
-                stats["wins_team_1"] += 1
-            elif away_winner:
-                stats["wins_team_2"] += 1
-            else:
-                stats["draws"] += 1
-        elif away_team == team_1_id:
-            stats["away_games"] += 1
-            if away_winner:
-                stats["wins_team_1"] += 1
-            elif home_winner:
-                stats["wins_team_2"] += 1
-            else:
-                stats["draws"] += 1
-
-    return stats
-
-def latest_H2H(team_1, team_2, league):
+@traced("fetch.league_h2h")
+async def league_H2H(league, seasons=None, source=None):
+    """H2H aggregates for every pair of teams that met in a league, computed in one batch.
+
+    Covers the given seasons (default: the current one), or every stored
+    season in warehouse mode. Each pair is reported once, from the point
+    of view of the team with the lower ID.
+    """
+    if from_warehouse(source):
+        league_id = warehouse.get_league_id(league)
+        if isinstance(league_id, dict):
+            return league_id
+        fixtures = warehouse.league_fixtures(league_id, seasons)
+    else:
+        league_id = await get_league_id(league)
+        if not league_id or isinstance(league_id, dict):
+            return {"error_code": 404, "message": "League not found"}
+
+        responses = await gather_bounded(
+            api_get("/fixtures", params={"league": league_id, "season": season})
+            for season in seasons or [get_season_year()]
+        )
+        fixtures = []
+        for response in responses:
+            if response.status_code != 200:
+                return {"error_code": response.status_code, "message": response.json().get("message")}
+            fixtures.extend(response.json().get("response", []))
+
+    names = {}
+    for f in fixtures:
+        for side in ("home", "away"):
+            names[f["teams"][side]["id"]] = f["teams"][side]["name"]
+
+    return [
+        {"team_1": names[team_1_id], "team_2": names[team_2_id], **summary}
+        for (team_1_id, team_2_id), summary in pair_summaries(fixture_table(fixtures)).items()
+        if team_1_id < team_2_id
+    ]
+
+@traced("fetch.latest_h2h")
+async def latest_H2H(team_1, team_2, league, source=None):
     """Fetch the latest H2H match stats between two teams in a given league."""
-    team_1_id = get_team_id(team_1, league)
-    team_2_id = get_team_id(team_2, league)
+    if from_warehouse(source):
+        season = get_season_year()
+        team_1_id = warehouse.get_team_id(team_1, league, season)
+        team_2_id = warehouse.get_team_id(team_2, league, season)
 
-    if not team_1_id or not team_2_id:
-        return {"error_code": 404, "message": "Teams not found"}
+        if isinstance(team_1_id, dict) or isinstance(team_2_id, dict):
+            return {"error_code": 404, "message": "Teams not found"}
 
-    url = f"{BASE_URL}/fixtures/headtohead"
-    params = {"h2h": f"{team_1_id}-{team_2_id}"}
+        fixtures = warehouse.h2h_fixtures(team_1_id, team_2_id)
+    else:
+        team_1_id = await get_team_id(team_1, league)
+        team_2_id = await get_team_id(team_2, league)
 
-    response = requests.get(url, headers=headers, params=params)
+        if not team_1_id or not team_2_id:
+            return {"error_code": 404, "message": "Teams not found"}
+        if isinstance(team_1_id, dict):
+            return team_1_id
+        if isinstance(team_2_id, dict):
+            return team_2_id
 
-    if response.status_code != 200:
-        return {"error_code": response.status_code, "message": response.json().get("message")}
+        # This season's meetings come from the fixture index, without a request once it's built
+        fixtures = await fixture_index.between(team_1_id, team_2_id, get_season_year())
+        if isinstance(fixtures, dict) or not any(is_finished(f) for f in fixtures):
+            path = "/fixtures/headtohead"
+            params = {"h2h": f"{team_1_id}-{team_2_id}"}
 
-    data = response.json()
-    fixtures = data.get("response", [])
+            response = await api_get(path, params=params)
+
+            if response.status_code != 200:
+                return {"error_code": response.status_code, "message": response.json().get("message")}
+
+            data = response.json()
+            fixtures = sorted(data.get("response", []), key=lambda x: x["fixture"]["date"], reverse=True)
 
     if not fixtures:
         return {"error_code": 404, "message": "No fixtures found"}
 
-    latest_match = fixtures[0]  # Get the most recent match
+    # The most recent match that has a final score, or the most recent one if none has
+    latest_match = next((f for f in fixtures if is_finished(f)), fixtures[0])
     match_id = latest_match["fixture"]["id"]
 
     # Fetch match statistics
-    stats_url = f"{BASE_URL}/fixtures/statistics"
-    stats_params = {"fixture": match_id}
-
-    stats_response = requests.get(stats_url, headers=headers, params=stats_params)
+    if from_warehouse(source):
+        stats_data = warehouse.fixture_payload(match_id, "statistics")
+    else:
+        stats_data = await fixture_statistics(match_id, finished=is_finished(latest_match))
 
-    if stats_response.status_code != 200:
-        return {"error_code": stats_response.status_code, "message": stats_response.json().get("message")}
+    if "error_code" in stats_data:
+        return stats_data
 
-    stats_data = stats_response.json()
     if not stats_data.get("response"):
         return {"error_code": 404, "message": "No statistics found"}
 
@@ -149,12 +246,6 @@ def latest_H2H(team_1, team_2, league):
     team_1_stats = stats_data["response"][0]["statistics"]
     team_2_stats = stats_data["response"][1]["statistics"]
 
-    def get_stat(stats, name):
-        for stat in stats:
-            if stat["type"] == name:
-                return stat["value"]
-        return 0  # Default to 0 if stat is missing
-
     match_stats = {
         "match_date": latest_match["fixture"]["date"],
         "final_score": {
@@ -162,169 +253,144 @@ def latest_H2H(team_1, team_2, league):
             team_2: latest_match["score"]["fulltime"]["away"]
         },
         "stats": {
-            team_1: {
-                "shots_total": get_stat(team_1_stats, "Total Shots"),
-                "shots_on_target": get_stat(team_1_stats, "Shots on Goal"),
-                "shots_off_target": get_stat(team_1_stats, "Shots off Goal"),
-                "fouls": get_stat(team_1_stats, "Fouls"),
-                "corners": get_stat(team_1_stats, "Corner Kicks"),
-                "offsides": get_stat(team_1_stats, "Offsides"),
-                "ball_possession": get_stat(team_1_stats, "Ball Possession"),
-                "yellow_cards": get_stat(team_1_stats, "Yellow Cards"),
-                "red_cards": get_stat(team_1_stats, "Red Cards"),
-                "passes_total": get_stat(team_1_stats, "Total passes"),
-                "passes_accuracy": get_stat(team_1_stats, "Passes accurate")
-            },
-            team_2: {
-                "shots_total": get_stat(team_2_stats, "Total Shots"),
-                "shots_on_target": get_stat(team_2_stats, "Shots on Goal"),
-                "shots_off_target": get_stat(team_2_stats, "Shots off Goal"),
-                "fouls": get_stat(team_2_stats, "Fouls"),
-                "corners": get_stat(team_2_stats, "Corner Kicks"),
-                "offsides": get_stat(team_2_stats, "Offsides"),
-                "ball_possession": get_stat(team_2_stats, "Ball Possession"),
-                "yellow_cards": get_stat(team_2_stats, "Yellow Cards"),
-                "red_cards": get_stat(team_2_stats, "Red Cards"),
-                "passes_total": get_stat(team_2_stats, "Total passes"),
-                "passes_accuracy": get_stat(team_2_stats, "Passes accurate")
-            }
+            team_1: team_match_stats(team_1_stats),
+            team_2: team_match_stats(team_2_stats)
         }
     }
 
     return match_stats
 
-def recent_matches(team_1, team_2, league, number_matches):
-    """Fetch last 3 matches for each team with detailed statistics."""
-    team_1_id = get_team_id(team_1, league)
-    team_2_id = get_team_id(team_2, league)
-
-    if not team_1_id or not team_2_id:
-        return {"error_code": 404, "message": "Teams not found"}
+def team_match_stats(stats):
+    """Extract one team's match statistics from a /fixtures/statistics entry."""
+    return TEAM_MATCH_STATS.extract(stats)
 
-    def get_team_matches(team_id, team_name):
-        url = f"{BASE_URL}/fixtures"
-        params = {
-            "team": team_id,
-            "season": get_season_year(),
-            "status": "FT"  # Only finished matches
-        }
+def build_match_info(match, stats_data, team_id):
+    """Summarize one of a team's fixtures from that team's point of view."""
+    # Get the teams data
+    home_stats = stats_data["response"][0]["statistics"]
+    away_stats = stats_data["response"][1]["statistics"]
 
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code != 200:
-            return {"error_code": response.status_code, "message": response.json().get("message")}
+    # Determine which team is the one we're looking for
+    home_team = match["teams"]["home"]
+    away_team = match["teams"]["away"]
+    is_home = home_team["id"] == team_id
+    
+    our_team = home_team if is_home else away_team
+    opponent_team = away_team if is_home else home_team
+    our_score = match["goals"]["home"] if is_home else match["goals"]["away"]
+    opponent_score = match["goals"]["away"] if is_home else match["goals"]["home"]
+
+    # Get the correct stats based on home/away
+    our_stats = home_stats if is_home else away_stats
+
+    return {
+        "date": match["fixture"]["date"],
+        "opponent": opponent_team["name"],
+        "score": f"{our_score}-{opponent_score}",
+        "result": "W" if our_team.get("winner") else ("L" if opponent_team.get("winner") else "D"),
+        "stats": team_match_stats(our_stats)
+    }
 
-        matches_data = response.json()
-        matches = matches_data.get("response", [])
-        
+@traced("fetch.team_recent_matches")
+async def team_recent_matches(team_id, team_name, number_matches, source=None):
+    """Fetch the last finished matches of one team with detailed statistics."""
+    if from_warehouse(source):
+        matches = warehouse.team_fixtures(team_id, get_season_year(), number_matches)
         if not matches:
             return {"error_code": 404, "message": f"No matches found for {team_name}"}
-            
-        # Sort matches by date (newest first) and take last 3
-        matches.sort(key=lambda x: x["fixture"]["date"], reverse=True)
-        matches = matches[:number_matches]
-        team_matches = []
 
-        for match in matches:
-            match_id = match["fixture"]["id"]
-            
-            # Get match statistics
-            stats_url = f"{BASE_URL}/fixtures/statistics"
-            stats_params = {"fixture": match_id}
-            
-            stats_response = requests.get(stats_url, headers=headers, params=stats_params)
-            if stats_response.status_code != 200:
-                return {"error_code": stats_response.status_code, "message": stats_response.json().get("message")}
+        stats = [warehouse.fixture_payload(match["fixture"]["id"], "statistics") for match in matches]
+    else:
+        matches = await fixture_index.last_finished(team_id, team_name, get_season_year(), number_matches)
+        if isinstance(matches, dict):
+            return matches
 
-            stats_data = stats_response.json()
+        # Fetch statistics for every fixture in one bounded batch
+        stats = await gather_bounded(fixture_statistics(match["fixture"]["id"]) for match in matches)
 
-            if not stats_data.get("response"):
-                return {"error_code": 404, "message": f"No statistics found for match {match_id}"}
+    team_matches = []
+    for match, stats_data in zip(matches, stats):
+        if "error_code" in stats_data:
+            return stats_data
+        if not stats_data.get("response"):
+            return {"error_code": 404, "message": f"No statistics found for match {match['fixture']['id']}"}
+        team_matches.append(build_match_info(match, stats_data, team_id))
 
-            # Get the teams data
-            home_stats = stats_data["response"][0]["statistics"]
-            away_stats = stats_data["response"][1]["statistics"]
+    return team_matches
 
-            # Determine which team is the one we're looking for
-            home_team = match["teams"]["home"]
-            away_team = match["teams"]["away"]
-            is_home = home_team["id"] == team_id
-            
-            our_team = home_team if is_home else away_team
-            opponent_team = away_team if is_home else home_team
-            our_score = match["goals"]["home"] if is_home else match["goals"]["away"]
-            opponent_score = match["goals"]["away"] if is_home else match["goals"]["home"]
+async def recent_matches(team_1, team_2, league, number_matches, source=None):
+    """Fetch last 3 matches for each team with detailed statistics."""
+    if from_warehouse(source):
+        team_1_id = warehouse.get_team_id(team_1, league, get_season_year())
+        team_2_id = warehouse.get_team_id(team_2, league, get_season_year())
 
-            # Get the correct stats based on home/away
-            our_stats = home_stats if is_home else away_stats
-            
-            def get_stat(stats, name):
-                for stat in stats:
-                    if stat["type"] == name:
-                        value = stat["value"]
-                        if value is None:
-                            return 0
-                        if isinstance(value, str) and value.endswith('%'):
-                            return value
-                        return value
-                return 0
-
-            match_info = {
-                "date": match["fixture"]["date"],
-                "opponent": opponent_team["name"],
-                "score": f"{our_score}-{opponent_score}",
-                "result": "W" if our_team.get("winner") else ("L" if opponent_team.get("winner") else "D"),
-                "stats": {
-                    "shots_total": get_stat(our_stats, "Total Shots"),
-                    "shots_on_target": get_stat(our_stats, "Shots on Goal"),
-                    "shots_off_target": get_stat(our_stats, "Shots off Goal"),
-                    "fouls": get_stat(our_stats, "Fouls"),
-                    "corners": get_stat(our_stats, "Corner Kicks"),
-                    "offsides": get_stat(our_stats, "Offsides"),
-                    "ball_possession": get_stat(our_stats, "Ball Possession"),
-                    "yellow_cards": get_stat(our_stats, "Yellow Cards"),
-                    "red_cards": get_stat(our_stats, "Red Cards"),
-                    "passes_total": get_stat(our_stats, "Total passes"),
-                    "passes_accuracy": get_stat(our_stats, "Passes accurate")
-                }
-            }
-            team_matches.append(match_info)
+        if isinstance(team_1_id, dict) or isinstance(team_2_id, dict):
+            return {"error_code": 404, "message": "Teams not found"}
+    else:
+        team_1_id = await get_team_id(team_1, league)
+        team_2_id = await get_team_id(team_2, league)
+
+        if not team_1_id or not team_2_id:
+            return {"error_code": 404, "message": "Teams not found"}
+        if isinstance(team_1_id, dict):
+            return team_1_id
+        if isinstance(team_2_id, dict):
+            return team_2_id
+
+    # Both teams are fetched concurrently; a fixture they played against
+    # each other is shared through request coalescing and the fixture store
+    team_1_matches, team_2_matches = await asyncio.gather(
+        team_recent_matches(team_1_id, team_1, number_matches, source),
+        team_recent_matches(team_2_id, team_2, number_matches, source)
+    )
+
+    return {
+        team_1: team_1_matches,
+        team_2: team_2_matches
+    }
 
-        return team_matches
+@traced("fetch.player_season_stats")
+async def player_season_stats(player_name, team_name, league_name, season, source=None):
+    """Fetch season statistics for a specific player."""
+    if from_warehouse(source):
+        league_id = warehouse.get_league_id(league_name)
+        player_info = warehouse.get_player_id(player_name, team_name, league_name, season)
 
-    # Process teams independently
-    results = {}
-    results[team_1] = get_team_matches(team_1_id, team_1)
-    results[team_2] = get_team_matches(team_2_id, team_2)
+        if isinstance(league_id, dict) or isinstance(player_info, dict):
+            return {"error_code": 404, "message": "Player or league not found"}
 
-    return results
+        player_id, player_name, position = player_info
+        item = warehouse.player_season(player_id, league_id, season)
+        if item is None:
+            return {"error_code": 404, "message": "Player not found"}
 
-def player_season_stats(player_name, team_name, league_name, season):
-    """Fetch season statistics for a specific player."""
-    league_id = get_league_id(league_name)
-    player_info = get_player_id(player_name, team_name, league_name, season)
-    
-    if not league_id or not player_info:
-        return {"error_code": 404, "message": "Player or league not found"}
+        stats = next((s for s in item["statistics"] if s["league"]["id"] == league_id), item["statistics"][0])
+    else:
+        league_id = await get_league_id(league_name)
+        player_info = await get_player_id(player_name, team_name, league_name, season)
         
-    player_id, player_name, position = player_info
-    
-    # Get player statistics
-    url = f"{BASE_URL}/players"
-    params = {
-        "id": player_id,
-        "season": season,
-        "league": league_id
-    }
-    
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
-        return {"error_code": response.status_code, "message": response.json().get("message")}
+        if not league_id or not player_info:
+            return {"error_code": 404, "message": "Player or league not found"}
+            
+        player_id, player_name, position = player_info
         
-    data = response.json()
-    if not data["response"]:
-        return {"error_code": 404, "message": "Player not found"}
+        # Get player statistics
+        path = "/players"
+        params = {
+            "id": player_id,
+            "season": season,
+            "league": league_id
+        }
         
-    stats = data["response"][0]["statistics"][0]
+        response = await api_get(path, params=params)
+        if response.status_code != 200:
+            return {"error_code": response.status_code, "message": response.json().get("message")}
+            
+        data = response.json()
+        if not data["response"]:
+            return {"error_code": 404, "message": "Player not found"}
+            
+        stats = data["response"][0]["statistics"][0]
     
     # Format statistics based on position
     if position == "Goalkeeper":
@@ -410,7 +476,129 @@ def player_season_stats(player_name, team_name, league_name, season):
             }
         }
 
-def player_recent_matches(player_name, team_name, league_name, number_matches, season):
+def player_match_stats(stats, position):
+    """Format one player's /fixtures/players statistics for a single match."""
+    if position == "Goalkeeper":
+        return GOALKEEPER_MATCH_STATS.extract(stats)
+    return OUTFIELD_MATCH_STATS.extract(stats)
+
+def index_fixture_players(payload):
+    """Index a /fixtures/players payload by player ID: {player_id: statistics}."""
+    return {
+        player["player"]["id"]: player["statistics"][0]
+        for team in payload.get("response", [])
+        for player in team.get("players", [])
+    }
+
+@traced("fetch.fixture_player_index")
+async def fixture_player_index(match_id, source=None):
+    """Player index of a finished fixture, parsed once and kept in a bounded LRU."""
+    index = _player_indexes.get(match_id)
+    if index is not None:
+        _player_indexes.move_to_end(match_id)
+        return index
+
+    if from_warehouse(source):
+        payload = warehouse.fixture_payload(match_id, "players")
+    else:
+        payload = await fixture_players(match_id)
+    if "error_code" in payload:
+        return payload
+
+    index = index_fixture_players(payload)
+    # An empty payload may still be filled in later
+    if payload.get("response"):
+        _player_indexes[match_id] = index
+        if len(_player_indexes) > PLAYER_INDEX_CACHE_SIZE:
+            _player_indexes.popitem(last=False)
+    return index
+
+async def squad_recent_matches(player_infos, team_id, team_name, season, number_matches, source=None):
+    """Per-match statistics of several players of one team over its last finished fixtures.
+
+    player_infos are (player_id, name, position) tuples. Every fixture is
+    fetched and indexed once however many players are asked for.
+    Returns {player_id: [match stats]}, or an error dict.
+    """
+    if from_warehouse(source):
+        team_matches = [match["fixture"]["id"] for match in warehouse.team_fixtures(team_id, season, number_matches)]
+    else:
+        team_matches = await fixture_index.last_finished(team_id, team_name, season, number_matches)
+        if isinstance(team_matches, dict):
+            return team_matches
+        team_matches = [match["fixture"]["id"] for match in team_matches]
+
+    indexes = await gather_bounded(fixture_player_index(match_id, source) for match_id in team_matches)
+    for index in indexes:
+        if "error_code" in index:
+            return index
+
+    return {
+        player_id: [player_match_stats(index[player_id], position) for index in indexes if player_id in index]
+        for player_id, _, position in player_infos
+    }
+
+@traced("fetch.team_squad")
+async def team_squad(team_name, league_name, season, source=None):
+    """Resolve a team and list its squad: (team_id, [(player_id, name, position)]) or an error dict."""
+    if from_warehouse(source):
+        team_id = warehouse.get_team_id(team_name, league_name, season)
+        if isinstance(team_id, dict):
+            return team_id
+        return team_id, warehouse.squad(team_id, season)
+
+    team_id = await get_team_id(team_name, league_name, season)
+    if not team_id or isinstance(team_id, dict):
+        return {"error_code": 404, "message": f"Team not found: {team_name}"}
+
+    index = await squad_index(team_id)
+    if isinstance(index, dict):
+        return index
+    return team_id, index.values()
+
+async def resolve_players(player_names, team_name, league_name, season, source=None):
+    """Resolve a team and players of it: (team_id, {player_name: (player_id, name, position) or error dict}) or an error dict."""
+    if from_warehouse(source):
+        team_id = warehouse.get_team_id(team_name, league_name, season)
+        players = {
+            player_name: warehouse.get_player_id(player_name, team_name, league_name, season)
+            for player_name in player_names
+        }
+    else:
+        league_id = await get_league_id(league_name)
+        if not league_id or isinstance(league_id, dict):
+            return {"error_code": 404, "message": "League not found"}
+
+        team_id = await get_team_id(team_name, league_name, season)
+        players = await get_player_ids(player_names, team_name, league_name, season)
+
+    if not team_id or isinstance(team_id, dict):
+        return {"error_code": 404, "message": f"Team not found: {team_name}"}
+    return team_id, players
+
+@traced("fetch.players_recent_matches")
+async def players_recent_matches(player_names, team_name, league_name, number_matches, season, source=None):
+    """Recent match statistics for several players of one team in one pass.
+
+    Returns {player_name: [match stats] or error dict}, or an error dict
+    if the team's matches couldn't be fetched.
+    """
+    resolved = await resolve_players(player_names, team_name, league_name, season, source)
+    if isinstance(resolved, dict):
+        return resolved
+    team_id, players = resolved
+
+    player_infos = [info for info in players.values() if not isinstance(info, dict)]
+    matches = await squad_recent_matches(player_infos, team_id, team_name, season, number_matches, source)
+    if "error_code" in matches:
+        return matches
+
+    return {
+        player_name: info if isinstance(info, dict) else matches[info[0]]
+        for player_name, info in players.items()
+    }
+
+async def player_recent_matches(player_name, team_name, league_name, number_matches, season, source=None):
     """
     Get statistics for a player's last three games.
     
@@ -418,119 +606,12 @@ def player_recent_matches(player_name, team_name, league_name, number_matches, s
         player_name (str): Name of the player
         league_name (str): Name of the league
         season (int): Season year (default is current year)
+        source (str): "api" or "warehouse" (default is DATA_SOURCE)
     
     Returns:
         list: List of player statistics for last three games or None if error occurs
     """
-    # First get league ID and player information
-    league_id = get_league_id(league_name)
-    if not league_id:
-        return {"error_code": 404, "message": "League not found"}
-    
-    player_info = get_player_id(player_name, team_name, league_name, season)
-    if not player_info:
-        return {"error_code": 404, "message": "Player not found"}
-        
-    player_id, player_name, position = player_info
-    team_id = get_team_id(team_name, league_name, season)
-    
-    team_matches = get_team_matches(team_id, team_name, season, number_matches)
-    player_stats = []
-
-    for match_id in team_matches:
-        stats_url = f"{BASE_URL}/fixtures/players"
-        stats_params = {"fixture": match_id}
-
-        stats_response = requests.get(stats_url, headers=headers, params=stats_params)
-        if stats_response.status_code != 200:
-            return {"error_code": stats_response.status_code, "message": stats_response.json().get("message")}
-
-        stats_data = stats_response.json()
-
-        for team in stats_data.get("response", []):
-            for player in team.get("players", []):
-                if player["player"]["id"] == player_id:
-                    stats = player["statistics"][0]
-                    
-                    # Safely get minutes played with a default of 0
-                    minutes_played = stats.get("games", {}).get("minutes", 0) or 0
-                    
-                    if position == "Goalkeeper":
-                        match_stats = {
-                            "games": {
-                                "appearances": 1 if minutes_played > 0 else 0,
-                                "minutes_played": minutes_played
-                            },
-                            "goals": {
-                                "conceded": stats.get("goals", {}).get("conceded", 0) or 0,
-                                "saves": stats.get("goals", {}).get("saves", 0) or 0
-                            },
-                            "passes": {
-                                "total": stats.get("passes", {}).get("total", 0) or 0,
-                                "key": stats.get("passes", {}).get("key", 0) or 0,
-                                "accuracy": stats.get("passes", {}).get("accuracy", 0) or 0
-                            },
-                            "tackles": {
-                                "total": stats.get("tackles", {}).get("total", 0) or 0,
-                                "blocks": stats.get("tackles", {}).get("blocks", 0) or 0,
-                                "interceptions": stats.get("tackles", {}).get("interceptions", 0) or 0
-                            },
-                            "duels": {
-                                "total": stats.get("duels", {}).get("total", 0) or 0,
-                                "won": stats.get("duels", {}).get("won", 0) or 0
-                            },
-                            "dribbles": {
-                                "attempts": stats.get("dribbles", {}).get("attempts", 0) or 0,
-                                "success": stats.get("dribbles", {}).get("success", 0) or 0
-                            },
-                            "fouls": {
-                                "drawn": stats.get("fouls", {}).get("drawn", 0) or 0,
-                                "committed": stats.get("fouls", {}).get("committed", 0) or 0
-                            },
-                            "cards": {
-                                "yellow": stats.get("cards", {}).get("yellow", 0) or 0,
-                                "red": stats.get("cards", {}).get("red", 0) or 0
-                            }
-                        }
-                    else:
-                        match_stats = {
-                            "games": {
-                                "appearances": 1 if minutes_played > 0 else 0,
-                                "minutes_played": minutes_played
-                            },
-                            "goals": {
-                                "total": stats.get("goals", {}).get("total", 0) or 0,
-                                "assists": stats.get("goals", {}).get("assists", 0) or 0,
-                                "totalshots": stats.get("shots", {}).get("total", 0) or 0,
-                                "shotsongoal": stats.get("shots", {}).get("on", 0) or 0
-                            },
-                            "passes": {
-                                "total": stats.get("passes", {}).get("total", 0) or 0,
-                                "key": stats.get("passes", {}).get("key", 0) or 0,
-                                "accuracy": stats.get("passes", {}).get("accuracy", 0) or 0
-                            },
-                            "tackles": {
-                                "total": stats.get("tackles", {}).get("total", 0) or 0,
-                                "blocks": stats.get("tackles", {}).get("blocks", 0) or 0,
-                                "interceptions": stats.get("tackles", {}).get("interceptions", 0) or 0
-                            },
-                            "duels": {
-                                "total": stats.get("duels", {}).get("total", 0) or 0,
-                                "won": stats.get("duels", {}).get("won", 0) or 0
-                            },
-                            "dribbles": {
-                                "attempts": stats.get("dribbles", {}).get("attempts", 0) or 0,
-                                "success": stats.get("dribbles", {}).get("success", 0) or 0
-                            },
-                            "fouls": {
-                                "drawn": stats.get("fouls", {}).get("drawn", 0) or 0,
-                                "committed": stats.get("fouls", {}).get("committed", 0) or 0
-                            },
-                            "cards": {
-                                "yellow": stats.get("cards", {}).get("yellow", 0) or 0,
-                                "red": stats.get("cards", {}).get("red", 0) or 0
-                            }
-                        }
-                    player_stats.append(match_stats)
-
-    return player_stats
\ No newline at end of file
+    players = await players_recent_matches([player_name], team_name, league_name, number_matches, season, source)
+    if "error_code" in players:
+        return players
+    return players[player_name]
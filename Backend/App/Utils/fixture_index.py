@@ -0,0 +1,193 @@
+"""Per-team, date-ordered index of a season's fixtures.
+
+Answering "last N finished fixtures of a team" used to mean listing every
+finished fixture of its season and sorting them on each request. Here a
+team's season is listed once, kept sorted by kickoff, and afterwards only
+the part that can still change is re-listed: from the earliest fixture
+that hasn't finished up to today. That refresh is only due once such a
+fixture should be over (kickoff + MATCH_DURATION); fixtures that are live
+or overdue are retried after FIXTURE_INDEX_RETRY_SECONDS, backing off as
+they stay unfinished, for at most FIXTURE_INDEX_GRACE_SECONDS. Fixtures still unfinished after that, and
+postponed ones or ones without a date, are left to the full listing of
+the season, every FIXTURE_INDEX_TTL_SECONDS. Between refreshes, lookups
+don't touch the network.
+"""
+import os
+import time
+from bisect import insort
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+
+from .fixture_store import FINISHED_STATUSES
+from .http_client import api_get
+from .tracing import traced
+
+# Statuses that will never change to a finished one
+VOID_STATUSES = {"CANC", "ABD", "AWD", "WO"}
+# Statuses whose date isn't the one the fixture will be played on
+UNSCHEDULED_STATUSES = {"TBD", "PST"}
+
+# Kickoff to final whistle, with some slack for stoppage and extra time
+MATCH_DURATION = timedelta(hours=2, minutes=30)
+
+
+def _kickoff(fixture):
+    return datetime.fromisoformat(fixture["fixture"]["date"])
+
+
+class TeamSeason:
+    """One team's fixtures of one season, newest first, with the time of its next refresh."""
+
+    def __init__(self):
+        self.fixtures = []
+        self._by_id = {}
+        self.listed_at = None
+        self.due = None
+
+    def merge(self, fixtures):
+        """Insert new fixtures and replace the known ones, keeping the order by date."""
+        for fixture in fixtures:
+            old = self._by_id.pop(fixture["fixture"]["id"], None)
+            if old is not None:
+                self.fixtures.remove(old)
+            self._by_id[fixture["fixture"]["id"]] = fixture
+            # Negated timestamps keep the list newest first for insort
+            insort(self.fixtures, fixture, key=lambda f: -_kickoff(f).timestamp())
+
+    def pending(self):
+        """Scheduled fixtures that haven't finished yet and still might, oldest first."""
+        return [
+            f for f in reversed(self.fixtures)
+            if f["fixture"]["status"]["short"] not in FINISHED_STATUSES | VOID_STATUSES | UNSCHEDULED_STATUSES
+        ]
+
+
+class FixtureIndex:
+    def __init__(self, ttl, retry_seconds, grace_seconds, max_teams):
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self.grace_seconds = grace_seconds
+        self.max_teams = max_teams
+        # (team_id, season) -> TeamSeason
+        self._seasons = OrderedDict()
+        self.stats = {
+            "full_listings": 0,
+            "incremental_listings": 0,
+            "hits": 0
+        }
+
+    def _watched(self, entry, now):
+        """Pending fixtures worth an incremental listing, oldest first: not overdue past the grace period."""
+        return [
+            f for f in entry.pending()
+            if now < (_kickoff(f) + MATCH_DURATION).timestamp() + self.grace_seconds
+        ]
+
+    def _schedule(self, entry, now):
+        """Set when the entry has to be refreshed next."""
+        due = entry.listed_at + self.ttl
+        watched = self._watched(entry, now)
+        if watched:
+            over = (_kickoff(watched[0]) + MATCH_DURATION).timestamp()
+            # A fixture that should be over but isn't reported finished yet: check back,
+            # waiting as long again as it has been overdue
+            due = min(due, max(over, now + max(self.retry_seconds, now - over)))
+        entry.due = due
+
+    async def _list(self, team_id, season, since=None):
+        params = {"team": team_id, "season": season}
+        if since is not None:
+            params.update({"from": since.isoformat(), "to": date.today().isoformat()})
+        response = await api_get("/fixtures", params=params)
+        if response.status_code != 200:
+            return {"error_code": response.status_code, "message": response.json().get("message")}
+        return response.json().get("response", [])
+
+    async def season(self, team_id, season):
+        """The team's fixtures of the season, newest first, refreshed when due, or an error dict."""
+        key = (team_id, season)
+        entry = self._seasons.get(key)
+        now = time.time()
+        if entry is not None and now < entry.due:
+            self._seasons.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry.fixtures
+
+        fixtures = None
+        if entry is not None and now < entry.listed_at + self.ttl:
+            watched = self._watched(entry, now)
+            if not watched:
+                # Only fixtures past their grace period are left, for the full listing to pick up
+                self._schedule(entry, now)
+                return entry.fixtures
+            oldest = watched[0]
+            since = _kickoff(oldest).astimezone(timezone.utc).date()
+            fixtures = await self._list(team_id, season, since)
+            if isinstance(fixtures, dict):
+                return fixtures
+            self.stats["incremental_listings"] += 1
+            # Moved out of the listed dates (e.g. postponed): only a full listing finds it again
+            if oldest["fixture"]["id"] not in {f["fixture"]["id"] for f in fixtures}:
+                fixtures = None
+
+        if fixtures is None:
+            fixtures = await self._list(team_id, season)
+            if isinstance(fixtures, dict):
+                return fixtures
+            entry = TeamSeason()
+            entry.listed_at = now
+            self.stats["full_listings"] += 1
+
+        entry.merge(fixtures)
+        self._schedule(entry, now)
+        self._seasons[key] = entry
+        self._seasons.move_to_end(key)
+        while len(self._seasons) > self.max_teams:
+            self._seasons.popitem(last=False)
+        return entry.fixtures
+
+    @traced("fixtures.last_finished")
+    async def last_finished(self, team_id, team_name, season, number_matches):
+        """The team's last `number_matches` finished fixtures of the season, newest first, or an error dict."""
+        fixtures = await self.season(team_id, season)
+        if isinstance(fixtures, dict):
+            return fixtures
+
+        finished = []
+        for fixture in fixtures:
+            if len(finished) == number_matches:
+                break
+            if fixture["fixture"]["status"]["short"] in FINISHED_STATUSES:
+                finished.append(fixture)
+
+        if not finished:
+            return {"error_code": 404, "message": f"No matches found for {team_name}"}
+        return finished
+
+    async def between(self, team_id, opponent_id, season):
+        """Every fixture of the season between two teams, newest first, or an error dict."""
+        fixtures = await self.season(team_id, season)
+        if isinstance(fixtures, dict):
+            return fixtures
+        return [
+            f for f in fixtures
+            if opponent_id in (f["teams"]["home"]["id"], f["teams"]["away"]["id"])
+        ]
+
+    def clear(self):
+        self._seasons.clear()
+
+    def info(self):
+        return {
+            "teams": len(self._seasons),
+            "fixtures": sum(len(entry.fixtures) for entry in self._seasons.values()),
+            **self.stats
+        }
+
+
+fixture_index = FixtureIndex(
+    ttl=float(os.getenv("FIXTURE_INDEX_TTL_SECONDS", str(24 * 3600))),
+    retry_seconds=float(os.getenv("FIXTURE_INDEX_RETRY_SECONDS", "300")),
+    grace_seconds=float(os.getenv("FIXTURE_INDEX_GRACE_SECONDS", str(6 * 3600))),
+    max_teams=int(os.getenv("FIXTURE_INDEX_SIZE", "2048"))
+)
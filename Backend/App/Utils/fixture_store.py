@@ -0,0 +1,127 @@
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Fixture statuses whose statistics can no longer change
+FINISHED_STATUSES = {"FT", "AET", "PEN"}
+
+
+def is_finished(fixture):
+    """Return True if an api-sports fixture object has finished."""
+    return fixture.get("fixture", {}).get("status", {}).get("short") in FINISHED_STATUSES
+
+
+class FixtureStore:
+    """Permanent store for finished-fixture payloads: a memory-bounded LRU over gzip files."""
+
+    def __init__(self, root=None, max_memory_bytes=64 * 1024 * 1024):
+        self.root = root
+        self.max_memory_bytes = max_memory_bytes
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, kind, fixture_id):
+        return os.path.join(self.root, kind, f"{fixture_id}.json.gz")
+
+    def _remember(self, key, payload, size):
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (payload, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def get(self, kind, fixture_id):
+        """Return the stored payload for a fixture, or None if it was never stored."""
+        key = (kind, int(fixture_id))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.root:
+            path = self._path(kind, fixture_id)
+            try:
+                with open(path, "rb") as f:
+                    raw = gzip.decompress(f.read())
+            except FileNotFoundError:
+                raw = None
+
+            if raw is not None:
+                payload = json.loads(raw)
+                with self._lock:
+                    self._remember(key, payload, len(raw))
+                    self.hits += 1
+                    self.disk_hits += 1
+                return payload
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, kind, fixture_id, payload):
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+
+        with self._lock:
+            self._remember((kind, int(fixture_id)), payload, len(raw))
+
+        if self.root:
+            path = self._path(kind, fixture_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a crash never leaves a truncated file behind
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(raw))
+            os.replace(tmp_path, path)
+
+    def clear(self):
+        """Forget the payloads held in memory; files on disk are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    def disk_usage(self):
+        """Count stored files and their compressed size per kind."""
+        usage = {}
+        if not self.root or not os.path.isdir(self.root):
+            return usage
+
+        for kind in os.listdir(self.root):
+            kind_dir = os.path.join(self.root, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            files = [e for e in os.scandir(kind_dir) if e.name.endswith(".json.gz")]
+            usage[kind] = {
+                "fixtures": len(files),
+                "bytes": sum(e.stat().st_size for e in files)
+            }
+        return usage
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._memory_bytes,
+            "disk": self.disk_usage(),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Set FIXTURE_STORE_DIR to keep finished-fixture payloads on disk across restarts
+fixture_store = FixtureStore(
+    root=os.getenv("FIXTURE_STORE_DIR"),
+    max_memory_bytes=int(os.getenv("FIXTURE_STORE_MEMORY_MB", "64")) * 1024 * 1024
+)
@@ -0,0 +1,118 @@
+import numpy as np
+
+from .fixture_store import FINISHED_STATUSES
+
+# Meetings shown in the H2H form string
+FORM_MATCHES = 5
+
+
+def fixture_table(fixtures):
+    """Columnar view of api-sports fixtures, newest first.
+
+    Goals of matches without a score count as 0; matches without a
+    winner flag count as draws, as H2H_stats always did.
+    """
+    fixtures = sorted(fixtures, key=lambda f: f["fixture"]["date"], reverse=True)
+    return {
+        "home_id": np.array([f["teams"]["home"]["id"] for f in fixtures], dtype=np.int64),
+        "away_id": np.array([f["teams"]["away"]["id"] for f in fixtures], dtype=np.int64),
+        "home_win": np.array([bool(f["teams"]["home"]["winner"]) for f in fixtures], dtype=bool),
+        "away_win": np.array([bool(f["teams"]["away"]["winner"]) for f in fixtures], dtype=bool),
+        "home_goals": np.array([f["goals"]["home"] or 0 for f in fixtures], dtype=np.int64),
+        "away_goals": np.array([f["goals"]["away"] or 0 for f in fixtures], dtype=np.int64),
+        "finished": np.array([f["fixture"]["status"]["short"] in FINISHED_STATUSES for f in fixtures], dtype=bool),
+    }
+
+
+def _directed(table):
+    """Every fixture twice, once from each side's point of view."""
+    n = len(table["home_id"])
+    order = np.arange(n)
+    return {
+        "team": np.concatenate([table["home_id"], table["away_id"]]),
+        "opponent": np.concatenate([table["away_id"], table["home_id"]]),
+        "is_home": np.concatenate([np.ones(n, dtype=bool), np.zeros(n, dtype=bool)]),
+        "win": np.concatenate([table["home_win"], table["away_win"]]),
+        "loss": np.concatenate([table["away_win"], table["home_win"]]),
+        "goals_for": np.concatenate([table["home_goals"], table["away_goals"]]),
+        "goals_against": np.concatenate([table["away_goals"], table["home_goals"]]),
+        "finished": np.concatenate([table["finished"], table["finished"]]),
+        "order": np.concatenate([order, order]),
+    }
+
+
+def _forms(rows, group, n_groups, last_n):
+    """Last-N results ("W"/"D"/"L", newest first) of the finished meetings of each group."""
+    finished = np.flatnonzero(rows["finished"])
+    idx = finished[np.lexsort((rows["order"][finished], group[finished]))]
+    g = group[idx]
+
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    rank = np.arange(len(g)) - np.repeat(starts, np.diff(np.r_[starts, len(g)]))
+    keep = rank < last_n
+    idx, g = idx[keep], g[keep]
+
+    letters = np.where(rows["win"][idx], "W", np.where(rows["loss"][idx], "L", "D"))
+    forms = [""] * n_groups
+    for group_id, letter in zip(g.tolist(), letters.tolist()):
+        forms[group_id] += letter
+    return forms
+
+
+def pair_summaries(table, last_n=FORM_MATCHES, finished_only=True):
+    """H2H aggregates for every (team_id, opponent_id) pair of a fixture table in one pass.
+
+    Each summary is from team_id's point of view: the H2H_stats counts,
+    goal totals, home and away splits and the recent form. Fixtures that
+    haven't finished are left out, unless `finished_only` is False: then
+    they count as 0-0 draws, as H2H_stats always counted them. The form
+    only ever covers finished meetings.
+    """
+    rows = _directed(table)
+    if finished_only:
+        rows = {name: values[rows["finished"]] for name, values in rows.items()}
+    if not len(rows["team"]):
+        return {}
+
+    pairs, group = np.unique(np.stack([rows["team"], rows["opponent"]], axis=1), axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    n_groups = len(pairs)
+
+    def total(weights=None):
+        return np.bincount(group, weights=weights, minlength=n_groups).astype(np.int64)
+
+    draw = ~rows["win"] & ~rows["loss"]
+    columns = {"games": None, "wins": rows["win"], "draws": draw, "losses": rows["loss"],
+               "goals_for": rows["goals_for"], "goals_against": rows["goals_against"]}
+    home = rows["is_home"]
+    overall = {name: total(values) for name, values in columns.items()}
+    at_home = {name: total(home if values is None else values * home) for name, values in columns.items()}
+    away = {name: overall[name] - at_home[name] for name in columns}
+    forms = _forms(rows, group, n_groups, last_n)
+
+    summaries = {}
+    for i, (team_id, opponent_id) in enumerate(pairs.tolist()):
+        summaries[(team_id, opponent_id)] = {
+            "total_games": int(overall["games"][i]),
+            "home_games": int(at_home["games"][i]),
+            "away_games": int(away["games"][i]),
+            "wins_team_1": int(overall["wins"][i]),
+            "wins_team_2": int(overall["losses"][i]),
+            "draws": int(overall["draws"][i]),
+            "goals_team_1": int(overall["goals_for"][i]),
+            "goals_team_2": int(overall["goals_against"][i]),
+            "home": {name: int(at_home[name][i]) for name in columns},
+            "away": {name: int(away[name][i]) for name in columns},
+            "form": forms[i],
+        }
+    return summaries
+
+
+def empty_summary():
+    split = {"games": 0, "wins": 0, "draws": 0, "losses": 0, "goals_for": 0, "goals_against": 0}
+    return {
+        "total_games": 0, "home_games": 0, "away_games": 0,
+        "wins_team_1": 0, "wins_team_2": 0, "draws": 0,
+        "goals_team_1": 0, "goals_team_2": 0,
+        "home": dict(split), "away": dict(split), "form": "",
+    }
@@ -0,0 +1,167 @@
+import asyncio
+import importlib.util
+import os
+
+import httpx
+from .rate_limit import BACKGROUND, INTERACTIVE, RateScheduler, current_priority
+from .tracing import count_upstream, span
+from .upstream_backend import upstream_transport
+
+try:
+    from .creds import api_key
+except ImportError:
+    # Not needed when replaying recordings (API_BACKEND=replay)
+    api_key = os.getenv("API_SPORTS_KEY", "")
+
+# Overridable to point at a stand-in server, see upstream_backend
+BASE_URL = os.getenv("API_BASE_URL", "https://v3.football.api-sports.io")
+
+headers = {
+    "x-rapidapi-key": api_key,
+    "x-rapidapi-host": "v3.football.api-sports.io"
+}
+
+# Upper bound on concurrent requests to the api-sports host
+MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT", "10"))
+# Upper bound on requests a single fan-out stage keeps in flight
+FANOUT_LIMIT = int(os.getenv("API_FANOUT_LIMIT", "10"))
+
+# api-sports quotas: requests per minute of the plan, bucket size for short
+# bursts, daily requests kept back for interactive use, and how long an
+# interactive request may queue before it is answered with a 429
+RATE_PER_MINUTE = int(os.getenv("API_RATE_PER_MINUTE", "300"))
+RATE_BURST = int(os.getenv("API_RATE_BURST", "10"))
+DAILY_RESERVE = int(os.getenv("API_DAILY_RESERVE", "100"))
+QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+# Times a request answered with 429 is queued again
+RATE_LIMIT_RETRIES = 2
+
+# HTTP/2 needs the optional h2 package
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_client = None
+_semaphore = None
+_loop = None
+# Upstream requests currently in flight, keyed on ((path, params), priority)
+_in_flight = {}
+
+upstream_stats = {
+    "requests": 0,
+    "coalesced": 0
+}
+
+rate_scheduler = RateScheduler(RATE_PER_MINUTE, RATE_BURST, DAILY_RESERVE, QUEUE_TIMEOUT)
+
+
+def get_client():
+    """Return the shared AsyncClient, creating it for the running event loop."""
+    global _client, _semaphore, _loop, _in_flight
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _loop is not loop:
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_CONNECTIONS
+        )
+        _client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            headers=headers,
+            http2=HTTP2,
+            limits=limits,
+            timeout=httpx.Timeout(TIMEOUT_SECONDS),
+            transport=upstream_transport(http2=HTTP2, limits=limits)
+        )
+        _semaphore = asyncio.Semaphore(MAX_CONNECTIONS)
+        _in_flight = {}
+        rate_scheduler.reset()
+        _loop = loop
+    return _client
+
+
+def request_key(path, params=None):
+    return path, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+
+def _quota_exhausted():
+    return httpx.Response(429, json={"message": "Upstream request quota exhausted, try again later"})
+
+
+async def _fetch(path, params):
+    client = get_client()
+    for _ in range(RATE_LIMIT_RETRIES + 1):
+        if not await rate_scheduler.acquire():
+            return _quota_exhausted()
+
+        async with _semaphore:
+            upstream_stats["requests"] += 1
+            with span("upstream"):
+                response = await client.get(path, params=params)
+
+        count_upstream(path, response.status_code, len(response.content))
+        rate_scheduler.observe(response)
+        if response.status_code != 429:
+            break
+    return response
+
+
+async def api_get(path, params=None):
+    """GET an api-sports path (e.g. "/fixtures") through the pooled client.
+
+    Identical concurrent requests share a single upstream call. Requests
+    are paced and queued by rate_scheduler, at background priority inside
+    rate_limit.background_requests(). A background request may join an
+    interactive call, but not the other way around: a background call can
+    be held back until the daily quota resets.
+    """
+    get_client()
+    priority = current_priority()
+    key = (request_key(path, params), priority)
+
+    task = _in_flight.get((key[0], INTERACTIVE))
+    if task is None and priority == BACKGROUND:
+        task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(path, params))
+        _in_flight[key] = task
+
+        def forget(done):
+            if _in_flight.get(key) is done:
+                del _in_flight[key]
+
+        task.add_done_callback(forget)
+    else:
+        upstream_stats["coalesced"] += 1
+
+    # Shield the shared call so one cancelled caller doesn't cancel it for the others
+    if priority == BACKGROUND:
+        return await asyncio.shield(task)
+    try:
+        # Queueing plus one upstream call, like a request of its own
+        return await asyncio.wait_for(asyncio.shield(task), rate_scheduler.queue_timeout + TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        rate_scheduler.stats["timed_out"] += 1
+        return _quota_exhausted()
+
+
+async def gather_bounded(coros, limit=FANOUT_LIMIT):
+    """Run coroutines concurrently, at most `limit` at a time, returning results in order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+async def close_client():
+    global _client, _semaphore, _loop, _in_flight
+
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _semaphore = None
+    _in_flight = {}
+    rate_scheduler.reset()
+    _loop = None
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from .name_index import normalize
+
+# How long a resolved ID stays valid, capped by the end of its season.
+TTL_SECONDS = {
+    "league": 30 * 24 * 3600,
+    "team": 7 * 24 * 3600,
+    "player": 24 * 3600,  # squads change during transfer windows
+}
+
+
+def season_end(season):
+    """Seasons run July to June, so season 2024 ends on 1 July 2025."""
+    return datetime(int(season) + 1, 7, 1).timestamp()
+
+
+class IdCache:
+    """LRU cache of resolved league/team/player IDs with an optional SQLite store."""
+
+    def __init__(self, max_entries=4096, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ids ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(kind, name, league=None, season=None):
+        """Key of a name (or a tuple of names), normalized like the name indexes so aliases share it."""
+        names = name if isinstance(name, tuple) else (name,)
+        name = "/".join(normalize(part) for part in names)
+        league = normalize(league) if league is not None else ""
+        return f"{kind}|{name}|{league}|{season or ''}"
+
+    def _expiry(self, kind, season):
+        expires_at = time.time() + TTL_SECONDS.get(kind, 24 * 3600)
+        if season:
+            expires_at = min(expires_at, season_end(season))
+        return expires_at
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, kind, name, league=None, season=None):
+        """Return the cached ID, or None on a miss or an expired entry."""
+        key = self.make_key(kind, name, league, season)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM ids WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    if isinstance(value, list):
+                        value = tuple(value)
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, kind, name, value, league=None, season=None):
+        key = self.make_key(kind, name, league, season)
+        expires_at = self._expiry(kind, season)
+
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ids (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM ids")
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
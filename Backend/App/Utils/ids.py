@@ -1,14 +1,18 @@
-import requests
-from fuzzywuzzy import process
-from .creds import api_key
+import os
+import time
+from .http_client import api_get
+from .id_cache import IdCache
+from .name_index import NameIndex, normalize
+from .tracing import traced
 from datetime import datetime
 
-BASE_URL = "https://v3.football.api-sports.io"
+# Set ID_CACHE_DB to a file path to keep resolved IDs across restarts
+id_cache = IdCache(db_path=os.getenv("ID_CACHE_DB"))
 
-headers = {
-    "x-rapidapi-key": api_key,
-    "x-rapidapi-host": "v3.football.api-sports.io"
-}
+# Name indexes keyed by what they cover, with the time they were built.
+# League and team indexes are keyed per season; squads are rebuilt daily.
+_indexes = {}
+SQUAD_INDEX_TTL = 24 * 3600
 
 def get_season_year():
     current_date = datetime.now()
@@ -21,100 +25,148 @@ def get_season_year():
     # Otherwise, return the current year
     return year - 1
 
-def get_league_id(league_name):
-    """Fetch league ID for a specific league."""
-    url = f"{BASE_URL}/leagues"
-    params = {"search": league_name}
-    
-    response = requests.get(url, headers=headers, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        leagues = data.get("response", [])
-        
-        if leagues:
-            # Get all league names and find best match
-            choices = [l["league"]["name"] for l in leagues]
-            best_match, _ = process.extractOne(league_name, choices)
-            return next(l["league"]["id"] for l in leagues if l["league"]["name"] == best_match)
-        else:
-            return {"error_code": response.status_code, "message": response.json().get("message")}
-    else:
+async def _load_index(key, path, params, entries, ttl=None):
+    """Return the NameIndex for key, building it from one upstream call when missing or expired."""
+    entry = _indexes.get(key)
+    if entry is not None and (ttl is None or time.time() - entry[1] < ttl):
+        return entry[0]
+
+    response = await api_get(path, params=params)
+    if response.status_code != 200:
         return {"error_code": response.status_code, "message": response.json().get("message")}
 
-def get_team_id(team_name, league_name, season=get_season_year()):
+    data = response.json()
+    if not data.get("response"):
+        return {"error_code": 404, "message": data.get("message") or f"Nothing found for {params}"}
+
+    index = NameIndex(entries(data["response"]))
+    _indexes[key] = (index, time.time())
+    return index
+
+@traced("ids.league")
+async def league_index(league_name):
+    """Index of the leagues matching a league name search."""
+    query = normalize(league_name)
+    return await _load_index(
+        ("leagues", query),
+        "/leagues",
+        {"search": query},
+        lambda leagues: ((l["league"]["name"], l["league"]["id"]) for l in leagues)
+    )
+
+@traced("ids.team")
+async def team_index(league_id, season):
+    """Index of every team of a league season."""
+    return await _load_index(
+        ("teams", league_id, season),
+        "/teams",
+        {"league": league_id, "season": season},
+        lambda teams: ((t["team"]["name"], t["team"]["id"]) for t in teams)
+    )
+
+@traced("ids.squad")
+async def squad_index(team_id):
+    """Index of a team's current squad, values are (id, name, position)."""
+    return await _load_index(
+        ("squad", team_id),
+        "/players/squads",
+        {"team": team_id},
+        lambda squads: ((p["name"], (p["id"], p["name"], p["position"])) for p in squads[0]["players"]),
+        ttl=SQUAD_INDEX_TTL
+    )
+
+async def get_league_id(league_name):
+    """Fetch league ID for a specific league."""
+    cached = id_cache.get("league", league_name)
+    if cached is not None:
+        return cached
+
+    index = await league_index(league_name)
+    if isinstance(index, dict):
+        return index
+
+    _, league_id, _ = index.resolve(league_name)
+    id_cache.set("league", league_name, league_id)
+    return league_id
+
+async def get_team_id(team_name, league_name, season=None):
     """Fetch team ID for a given team name."""
-    league_id = get_league_id(league_name)
-    if not league_id:
-        return None
+    team_ids = await get_team_ids([team_name], league_name, season)
+    return team_ids[team_name]
 
-    url = f"{BASE_URL}/teams"
-    params = {
-        "league": league_id,
-        "season": season
-    }
+async def get_team_ids(team_names, league_name, season=None):
+    """Resolve several team names of one league at once.
 
-    response = requests.get(url, headers=headers, params=params)
-    
-    if response.status_code == 200:
-        data = response.json()
-        teams = data.get("response", [])
-        
-        if teams:
-            # Get all team names and find best match
-            choices = [t["team"]["name"] for t in teams]
-            best_match, _ = process.extractOne(team_name, choices)
-            return next(t["team"]["id"] for t in teams if t["team"]["name"] == best_match)
+    Returns {team_name: team_id}, with an error dict for names that
+    couldn't be resolved.
+    """
+    season = season or get_season_year()
+    results = {}
+    missing = []
+    for team_name in team_names:
+        cached = id_cache.get("team", team_name, league_name, season)
+        if cached is not None:
+            results[team_name] = cached
         else:
-            return {"error_code": response.status_code, "message": response.json().get("message")}
-    else:
-        return {"error_code": response.status_code, "message": response.json().get("message")}
+            missing.append(team_name)
+
+    if not missing:
+        return results
+
+    league_id = await get_league_id(league_name)
+    if not league_id or isinstance(league_id, dict):
+        return {**results, **{team_name: league_id for team_name in missing}}
+
+    index = await team_index(league_id, season)
+    if isinstance(index, dict):
+        return {**results, **{team_name: index for team_name in missing}}
 
-def get_player_id(player_name, team_name, league_name, season=get_season_year()):
+    for team_name, (_, team_id, _) in index.resolve_many(missing).items():
+        id_cache.set("team", team_name, team_id, league_name, season)
+        results[team_name] = team_id
+
+    return results
+
+async def get_player_id(player_name, team_name, league_name, season=None):
     """Fetch player ID using team squad information."""
-    team_id = get_team_id(team_name, league_name, season)
-    
-    if not team_id:
-        return {"error_code": response.status_code, "message": response.json().get("message")}
-        
-    url = f"{BASE_URL}/players/squads"
-    params = {"team": team_id}
-    
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
-        return {"error_code": response.status_code, "message": response.json().get("message")}
-        
-    data = response.json()
-    players = data["response"][0]["players"]
-    
-    # Find closest matching player name
-    player_names = [p["name"] for p in players]
-    best_match, score = process.extractOne(player_name, player_names)
-    if score < 60:  # Threshold for matching
-        return {"error_code": response.status_code, "message": response.json().get("message")}
-    
-    player_data = next(p for p in players if p["name"] == best_match)
-    return player_data["id"], best_match, player_data["position"]
-
-def get_team_matches(team_id, team_name, season, number_matches):
-        url = f"{BASE_URL}/fixtures"
-        params = {
-            "team": team_id,
-            "season": season,
-            "status": "FT"  # Only finished matches
-        }
-
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code != 200:
-            return {"error_code": response.status_code, "message": response.json().get("message")}
-
-        matches_data = response.json()
-        matches = matches_data.get("response", [])
-        
-        if not matches:
-            return {"error_code": 404, "message": f"No matches found for {team_name}"}
-            
-        matches.sort(key=lambda x: x["fixture"]["date"], reverse=True)
-        matches = matches[:number_matches]
-        
-        return [match["fixture"]["id"] for match in matches]
\ No newline at end of file
+    players = await get_player_ids([player_name], team_name, league_name, season)
+    return players[player_name]
+
+@traced("ids.player")
+async def get_player_ids(player_names, team_name, league_name, season=None):
+    """Resolve several players of one team at once.
+
+    Returns {player_name: (player_id, name, position)}, with an error dict
+    for names that couldn't be resolved.
+    """
+    season = season or get_season_year()
+    results = {}
+    missing = []
+    for player_name in player_names:
+        cached = id_cache.get("player", (player_name, team_name), league_name, season)
+        if cached is not None:
+            results[player_name] = cached
+        else:
+            missing.append(player_name)
+
+    if not missing:
+        return results
+
+    team_id = await get_team_id(team_name, league_name, season)
+
+    if not team_id or isinstance(team_id, dict):
+        return {**results, **{player_name: {"error_code": 404, "message": "Team not found"} for player_name in missing}}
+
+    index = await squad_index(team_id)
+    if isinstance(index, dict):
+        return {**results, **{player_name: index for player_name in missing}}
+
+    for player_name, match in index.resolve_many(missing, min_score=60).items():
+        if match is None:  # Threshold for matching
+            results[player_name] = {"error_code": 404, "message": f"Player not found: {player_name}"}
+            continue
+        player_info = match[1]
+        id_cache.set("player", (player_name, team_name), player_info, league_name, season)
+        results[player_name] = player_info
+
+    return results
@@ -0,0 +1,111 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from fuzzywuzzy import process
+
+# Common short forms, keyed and valued by normalized name
+ALIASES = {
+    "man utd": "manchester united",
+    "man united": "manchester united",
+    "man u": "manchester united",
+    "man city": "manchester city",
+    "spurs": "tottenham",
+    "wolves": "wolverhampton wanderers",
+    "forest": "nottingham forest",
+    "barca": "barcelona",
+    "atleti": "atletico madrid",
+    "psg": "paris saint germain",
+    "inter milan": "inter",
+    "bayern": "bayern munchen",
+    "bayern munich": "bayern munchen",
+    "gladbach": "borussia monchengladbach",
+    "bvb": "borussia dortmund",
+    "dortmund": "borussia dortmund",
+    "epl": "premier league",
+    "laliga": "la liga",
+    "seriea": "serie a",
+}
+
+# Tokens that don't help tell clubs apart
+STOPWORDS = {"fc", "cf", "afc", "sc", "ac", "ssc", "club", "the"}
+
+# Fuzzy scoring only runs over this many best trigram matches
+MAX_CANDIDATES = 10
+
+
+def normalize(name):
+    """Strip accents, punctuation, case and filler words, then apply aliases."""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    tokens = [t for t in re.sub(r"[^a-z0-9]+", " ", text).split() if t not in STOPWORDS]
+    text = " ".join(tokens) or text.strip()
+    return ALIASES.get(text, text)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Fuzzy name -> value lookup built once from a candidate list.
+
+    Exact (normalized) names and aliases resolve through a hash map; other
+    queries are scored only against the candidates sharing the most
+    trigrams with them.
+    """
+
+    def __init__(self, entries):
+        self._values = {}
+        self._normalized = {}
+        self._exact = {}
+        self._postings = defaultdict(set)
+
+        for name, value in entries:
+            if name in self._values:
+                continue
+            normalized = normalize(name)
+            self._values[name] = value
+            self._normalized[name] = normalized
+            # The first candidate wins ties, as process.extractOne did
+            self._exact.setdefault(normalized, name)
+            for gram in trigrams(normalized):
+                self._postings[gram].add(name)
+
+    def __len__(self):
+        return len(self._values)
+
+    def values(self):
+        """Every indexed value, in the order the names were added."""
+        return list(self._values.values())
+
+    def candidates(self, normalized):
+        counts = Counter(
+            name
+            for gram in trigrams(normalized)
+            for name in self._postings.get(gram, ())
+        )
+        if not counts:
+            return list(self._values)
+        return [name for name, _ in counts.most_common(MAX_CANDIDATES)]
+
+    def resolve(self, query, min_score=0):
+        """Return (name, value, score) of the best match, or None if it scores below min_score."""
+        if not self._values:
+            return None
+
+        normalized = normalize(query)
+        name = self._exact.get(normalized)
+        if name is not None:
+            return name, self._values[name], 100
+
+        choices = {name: self._normalized[name] for name in self.candidates(normalized)}
+        _, score, name = process.extractOne(normalized, choices)
+        if score < min_score:
+            return None
+        return name, self._values[name], score
+
+    def resolve_many(self, queries, min_score=0):
+        """Resolve several names at once: {query: (name, value, score) or None}."""
+        return {query: self.resolve(query, min_score) for query in queries}
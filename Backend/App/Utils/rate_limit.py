@@ -0,0 +1,192 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Request priorities; lower is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority = ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_requests():
+    """Run the upstream requests made inside the block (and tasks it starts) at background priority."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def _seconds_to_next_minute():
+    return 60 - time.time() % 60
+
+
+def _seconds_to_next_day():
+    # api-sports daily quotas reset at midnight UTC
+    return 86400 - time.time() % 86400
+
+
+def _header(headers, name):
+    value = headers.get(name)
+    return int(value) if value is not None and value.isdigit() else None
+
+
+class RateScheduler:
+    """Paces upstream requests with a token bucket and queues them by priority.
+
+    Remaining quota is read from the api-sports rate-limit headers of every
+    response. When the per-minute quota runs out (or upstream answers 429),
+    dispatch pauses until the next minute; when the daily quota runs low,
+    background requests wait and the last `daily_reserve` requests are kept
+    for interactive ones. Requests wait in the queue rather than failing,
+    interactive ones for at most `queue_timeout` seconds.
+    """
+
+    def __init__(self, rate_per_minute, burst, daily_reserve=0, queue_timeout=30):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.daily_reserve = daily_reserve
+        self.queue_timeout = queue_timeout
+        self.quota = {
+            "minute_limit": None,
+            "minute_remaining": None,
+            "day_limit": None,
+            "day_remaining": None
+        }
+        self.stats = {
+            "dispatched": 0,
+            "queued": 0,
+            "throttled": 0,
+            "timed_out": 0,
+            "max_queue_depth": 0
+        }
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._day_resets_at = 0.0
+        self.reset()
+
+    def reset(self):
+        """Drop waiters and timers bound to a previous event loop."""
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._wakeup_at = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _blocked_until(self, priority, now):
+        if self._paused_until > now:
+            return self._paused_until
+
+        if self.quota["day_remaining"] is not None and time.time() >= self._day_resets_at:
+            # A new day started since the quota was last seen
+            self.quota["day_remaining"] = None
+
+        day_remaining = self.quota["day_remaining"]
+        if day_remaining is not None:
+            reserve = self.daily_reserve if priority == BACKGROUND else 0
+            if day_remaining <= reserve:
+                return now + _seconds_to_next_day()
+        return now
+
+    def _wake_at(self, when):
+        if self._wakeup is not None:
+            if self._wakeup_at <= when:
+                return
+            self._wakeup.cancel()
+        self._wakeup_at = when
+        self._wakeup = asyncio.get_running_loop().call_later(max(0.0, when - time.monotonic()), self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _dispatch(self):
+        now = time.monotonic()
+        self._refill(now)
+
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                # Timed out or cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+
+            blocked_until = self._blocked_until(priority, now)
+            if blocked_until > now:
+                self._wake_at(blocked_until)
+                break
+            if self._tokens < 1:
+                self._wake_at(now + (1 - self._tokens) / self.rate)
+                break
+
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self.stats["dispatched"] += 1
+            future.set_result(True)
+
+    async def acquire(self, priority=None):
+        """Wait for a turn to send one request; False if an interactive request timed out queueing."""
+        priority = current_priority() if priority is None else priority
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._dispatch()
+        if future.done():
+            return True
+
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth())
+        timeout = self.queue_timeout if priority == INTERACTIVE else None
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            return False
+
+    def observe(self, response):
+        """Update the quota from a response's rate-limit headers."""
+        headers = response.headers
+        observed = {
+            "minute_limit": _header(headers, "x-ratelimit-limit"),
+            "minute_remaining": _header(headers, "x-ratelimit-remaining"),
+            "day_limit": _header(headers, "x-ratelimit-requests-limit"),
+            "day_remaining": _header(headers, "x-ratelimit-requests-remaining")
+        }
+        self.quota.update({key: value for key, value in observed.items() if value is not None})
+        if observed["day_remaining"] is not None:
+            self._day_resets_at = time.time() + _seconds_to_next_day()
+
+        if response.status_code == 429:
+            self.stats["throttled"] += 1
+        if response.status_code == 429 or observed["minute_remaining"] == 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + _seconds_to_next_minute())
+            self._tokens = 0.0
+
+        if self._waiters:
+            self._dispatch()
+
+    def queue_depth(self):
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def info(self):
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "quota": dict(self.quota),
+            "queue_depth": self.queue_depth(),
+            "tokens": round(self._tokens, 2),
+            "paused_seconds": round(max(0.0, self._paused_until - now), 1),
+            **self.stats
+        }
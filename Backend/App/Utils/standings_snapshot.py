@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from .fetch_data import league_standings
+from .rate_limit import background_requests
+
+logger = logging.getLogger(__name__)
+
+
+class StandingsSnapshot:
+    """In-memory standings for every league in LEAGUES, kept fresh in the background.
+
+    Requests are served from the snapshot. When it is older than the refresh
+    interval it is still served while a refresh runs (stale-while-revalidate).
+    """
+
+    def __init__(self, interval, matchday_interval, matchday_weekdays):
+        self.interval = interval
+        self.matchday_interval = matchday_interval
+        self.matchday_weekdays = matchday_weekdays
+        self.data = None
+        self.updated_at = None
+        self._refresh_task = None
+        self._scheduler_task = None
+
+    def refresh_interval(self):
+        """Refresh faster on matchdays, when the tables actually move."""
+        if datetime.now().weekday() in self.matchday_weekdays:
+            return self.matchday_interval
+        return self.interval
+
+    def is_stale(self):
+        return self.updated_at is None or time.monotonic() - self.updated_at >= self.refresh_interval()
+
+    async def _refresh(self):
+        # Keep serving the last good table of a league that failed to refresh
+        data = await league_standings(previous=self.data)
+
+        self.data = data
+        self.updated_at = time.monotonic()
+        return data
+
+    def refresh(self):
+        """Start a refresh unless one is already running; returns its task."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        return self._refresh_task
+
+    async def get(self):
+        if self.data is None:
+            return await self.refresh()
+        if self.is_stale():
+            # Nobody waits on a revalidation, so it runs behind interactive requests
+            with background_requests():
+                self.refresh()
+        return self.data
+
+    async def _run(self):
+        while True:
+            try:
+                with background_requests():
+                    await self.refresh()
+            except Exception:
+                logger.exception("Standings refresh failed")
+            await asyncio.sleep(self.refresh_interval())
+
+    def start(self):
+        if self._scheduler_task is None:
+            self._scheduler_task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        for task in (self._scheduler_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._scheduler_task = None
+        self._refresh_task = None
+
+    def info(self):
+        return {
+            "leagues": list(self.data or {}),
+            "age_seconds": round(time.monotonic() - self.updated_at, 1) if self.updated_at else None,
+            "refresh_interval": self.refresh_interval()
+        }
+
+
+standings_snapshot = StandingsSnapshot(
+    interval=float(os.getenv("STANDINGS_REFRESH_SECONDS", "900")),
+    matchday_interval=float(os.getenv("STANDINGS_MATCHDAY_REFRESH_SECONDS", "120")),
+    # Weekdays (Monday is 0) treated as matchdays
+    matchday_weekdays={int(d) for d in os.getenv("STANDINGS_MATCHDAY_WEEKDAYS", "5,6").split(",") if d.strip()}
+)
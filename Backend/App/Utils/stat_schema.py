@@ -0,0 +1,109 @@
+"""Declarative stat schemas for api-sports payloads.
+
+A schema lists where each output field comes from in an api-sports
+payload and how its value is coerced. Extraction reads the payload in one
+pass (team stats into a type map, each player section looked up once)
+instead of one linear search or chained .get() per field.
+"""
+
+
+def or_zero(value):
+    return value or 0
+
+
+def played(minutes):
+    return 1 if (minutes or 0) > 0 else 0
+
+
+class TeamStatSchema:
+    """Maps /fixtures/statistics types to flat output fields.
+
+    fields: [(api stat type, output field)] or [(type, field, coerce)].
+    Missing stats and null values become 0 unless a coerce says otherwise.
+    """
+
+    def __init__(self, fields):
+        self._fields = tuple(field if len(field) == 3 else (*field, or_zero) for field in fields)
+        self.fields = tuple(name for _, name, _ in self._fields)
+
+    def extract(self, stats):
+        # Reversed so the first entry of a type wins, as the linear lookups did
+        by_type = {stat['type']: stat['value'] for stat in reversed(stats)}
+        return {name: coerce(by_type.get(stat_type)) for stat_type, name, coerce in self._fields}
+
+
+class PlayerStatSchema:
+    """Maps sections of a /fixtures/players or /players statistics entry to a nested record.
+
+    fields: [(output section, output key, api section, api key)] with an
+    optional coerce, or_zero by default. Each api section is looked up once.
+    """
+
+    def __init__(self, fields):
+        fields = [field if len(field) == 5 else (*field, or_zero) for field in fields]
+        self.fields = tuple((section, key) for section, key, _, _, _ in fields)
+        self._sections = tuple(dict.fromkeys(section for section, _, _, _, _ in fields))
+
+        # api section -> [(api key, output section, output key, coerce)], with None for or_zero
+        api_sections = {}
+        for section, key, api_section, api_key, coerce in fields:
+            api_sections.setdefault(api_section, []).append((api_key, section, key, None if coerce is or_zero else coerce))
+        self._api_sections = tuple(api_sections.items())
+
+    def extract(self, stats):
+        record = {section: {} for section in self._sections}
+        for api_section, items in self._api_sections:
+            values = stats.get(api_section) or {}
+            for api_key, section, key, coerce in items:
+                value = values.get(api_key)
+                record[section][key] = (value or 0) if coerce is None else coerce(value)
+        return record
+
+
+TEAM_MATCH_STATS = TeamStatSchema([
+    ("Total Shots", "shots_total"),
+    ("Shots on Goal", "shots_on_target"),
+    ("Shots off Goal", "shots_off_target"),
+    ("Fouls", "fouls"),
+    ("Corner Kicks", "corners"),
+    ("Offsides", "offsides"),
+    ("Ball Possession", "ball_possession"),
+    ("Yellow Cards", "yellow_cards"),
+    ("Red Cards", "red_cards"),
+    ("Total passes", "passes_total"),
+    ("Passes accurate", "passes_accuracy"),
+])
+
+_PLAYER_GAMES = [
+    ("games", "appearances", "games", "minutes", played),
+    ("games", "minutes_played", "games", "minutes"),
+]
+
+_PLAYER_COMMON = [
+    ("passes", "total", "passes", "total"),
+    ("passes", "key", "passes", "key"),
+    ("passes", "accuracy", "passes", "accuracy"),
+    ("tackles", "total", "tackles", "total"),
+    ("tackles", "blocks", "tackles", "blocks"),
+    ("tackles", "interceptions", "tackles", "interceptions"),
+    ("duels", "total", "duels", "total"),
+    ("duels", "won", "duels", "won"),
+    ("dribbles", "attempts", "dribbles", "attempts"),
+    ("dribbles", "success", "dribbles", "success"),
+    ("fouls", "drawn", "fouls", "drawn"),
+    ("fouls", "committed", "fouls", "committed"),
+    ("cards", "yellow", "cards", "yellow"),
+    ("cards", "red", "cards", "red"),
+]
+
+GOALKEEPER_MATCH_STATS = PlayerStatSchema(_PLAYER_GAMES + [
+    ("goals", "conceded", "goals", "conceded"),
+    ("goals", "saves", "goals", "saves"),
+] + _PLAYER_COMMON)
+
+OUTFIELD_MATCH_STATS = PlayerStatSchema(_PLAYER_GAMES + [
+    ("goals", "total", "goals", "total"),
+    ("goals", "assists", "goals", "assists"),
+    ("goals", "totalshots", "shots", "total"),
+    ("goals", "shotsongoal", "shots", "on"),
+] + _PLAYER_COMMON)
@@ -0,0 +1,178 @@
+"""Timed spans, upstream counters and their Prometheus exposition.
+
+With TRACING=1, functions decorated with @traced and blocks in span()
+record their duration into a per-span histogram and into the totals of
+the current request, which main.py can return as a Server-Timing header
+(SERVER_TIMING=1). With tracing off, @traced returns the function
+unchanged and span() a shared no-op context, so the hot paths pay nothing.
+
+Upstream counters are plain dict updates and are always kept.
+"""
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+ENABLED = os.getenv("TRACING", "0") == "1"
+SERVER_TIMING = ENABLED and os.getenv("SERVER_TIMING", "0") == "1"
+
+# Upper bounds (seconds) of the span histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+_request_spans = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+
+
+# Span name -> Histogram, and route -> Histogram of whole requests
+span_histograms = {}
+request_histograms = {}
+# (path, status) -> requests, path -> response bytes
+upstream_requests = {}
+upstream_bytes = {}
+
+
+def observe(name, seconds):
+    histogram = span_histograms.get(name)
+    if histogram is None:
+        histogram = span_histograms.setdefault(name, Histogram())
+    histogram.observe(seconds)
+
+    totals = _request_spans.get()
+    if totals is not None:
+        totals[name] = totals.get(name, 0.0) + seconds
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+
+
+def span(name):
+    """Time a block as span `name`."""
+    return _Span(name) if ENABLED else _NOOP
+
+
+def traced(name):
+    """Time every call of a (sync or async) function as span `name`."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    observe(name, time.perf_counter() - start)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    observe(name, time.perf_counter() - start)
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def request_trace():
+    """Collect the span totals of one request, including tasks it starts: yields {span: seconds}."""
+    totals = {}
+    token = _request_spans.set(totals)
+    try:
+        yield totals
+    finally:
+        _request_spans.reset(token)
+
+
+def observe_request(route, seconds):
+    histogram = request_histograms.get(route)
+    if histogram is None:
+        histogram = request_histograms.setdefault(route, Histogram())
+    histogram.observe(seconds)
+
+
+def server_timing(totals):
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def count_upstream(path, status_code, size):
+    key = (path, status_code)
+    upstream_requests[key] = upstream_requests.get(key, 0) + 1
+    upstream_bytes[path] = upstream_bytes.get(path, 0) + size
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(metric, histograms, label):
+    lines = [f"# TYPE {metric} histogram"]
+    for value, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_labels(**{label: value, 'le': bound})} {cumulative}")
+        lines.append(f"{metric}_bucket{_labels(**{label: value, 'le': '+Inf'})} {histogram.count}")
+        lines.append(f"{metric}_sum{_labels(**{label: value})} {histogram.sum:.6f}")
+        lines.append(f"{metric}_count{_labels(**{label: value})} {histogram.count}")
+    return lines
+
+
+def render_metrics(counters, gauges):
+    """Prometheus text exposition of the spans and upstream counters.
+
+    counters and gauges add other metrics, as {name: value} or, with labels,
+    {name: {(("label", "value"), ...): value}}.
+    """
+    lines = _histogram_lines("soccer_oracle_span_seconds", span_histograms, "span")
+    lines += _histogram_lines("soccer_oracle_request_seconds", request_histograms, "route")
+
+    lines.append("# TYPE soccer_oracle_upstream_requests_total counter")
+    for (path, status), count in sorted(upstream_requests.items()):
+        lines.append(f"soccer_oracle_upstream_requests_total{_labels(path=path, status=status)} {count}")
+    lines.append("# TYPE soccer_oracle_upstream_response_bytes_total counter")
+    for path, size in sorted(upstream_bytes.items()):
+        lines.append(f"soccer_oracle_upstream_response_bytes_total{_labels(path=path)} {size}")
+
+    for kind, metrics in (("counter", counters), ("gauge", gauges)):
+        for name, value in metrics.items():
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, dict):
+                for labels, labelled_value in value.items():
+                    lines.append(f"{name}{_labels(**dict(labels))} {labelled_value}")
+            else:
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
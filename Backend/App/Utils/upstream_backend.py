@@ -0,0 +1,139 @@
+"""Pluggable api-sports upstream: live, live with recording, or replayed from disk.
+
+API_BACKEND selects it:
+  live    talk to api-sports (the default)
+  record  talk to api-sports and write every response to API_RECORDINGS_DIR
+  replay  serve the recordings in API_RECORDINGS_DIR without any network,
+          adding API_REPLAY_LATENCY_MS of latency and failing a share
+          API_REPLAY_ERROR_RATE of requests with a 429 or 500
+
+The recordings can also be served over HTTP by a stand-in server, with
+API_BASE_URL pointed at it:
+
+    API_RECORDINGS_DIR=recordings uvicorn Backend.App.Utils.upstream_backend:replay_app --port 8100
+
+Replayed requests still go through the rate scheduler; raise
+API_RATE_PER_MINUTE when load testing.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+BACKEND = os.getenv("API_BACKEND", "live")
+RECORDINGS_DIR = os.getenv("API_RECORDINGS_DIR", "recordings")
+REPLAY_LATENCY_MS = float(os.getenv("API_REPLAY_LATENCY_MS", "0"))
+REPLAY_ERROR_RATE = float(os.getenv("API_REPLAY_ERROR_RATE", "0"))
+
+
+class Recordings:
+    """api-sports responses on disk, one JSON file per path and query string."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, path, params):
+        query = "&".join(f"{k}={v}" for k, v in sorted(params.multi_items()))
+        digest = hashlib.sha1(query.encode()).hexdigest()[:16]
+        return os.path.join(self.root, path.strip("/").replace("/", "_") or "root", f"{digest}.json")
+
+    def load(self, path, params):
+        try:
+            with open(self._path(path, params)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, path, params, status_code, body):
+        file_path = self._path(path, params)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        recording = {"path": path, "params": dict(params.multi_items()), "status": status_code, "body": body}
+        # Written whole and renamed, so a replay never reads a partial file
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(recording, f)
+        os.replace(tmp_path, file_path)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to a real transport and records each JSON response."""
+
+    def __init__(self, recordings, transport):
+        self.recordings = recordings
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        response = await self._transport.handle_async_request(request)
+        content = await response.aread()
+        await response.aclose()
+
+        try:
+            body = json.loads(content)
+        except ValueError:
+            body = None
+        if body is not None:
+            self.recordings.save(request.url.path, request.url.params, response.status_code, body)
+
+        # The content is already decoded, so the encoding headers no longer apply
+        headers = [(k, v) for k, v in response.headers.multi_items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=content)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded responses, with added latency and injected errors."""
+
+    def __init__(self, recordings, latency_ms=0, error_rate=0, seed=None):
+        self.recordings = recordings
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    async def respond(self, path, params):
+        """(status, body) for a request, as api-sports answered it when recorded."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._random.choice([429, 500]), {"message": "Injected upstream error"}
+
+        recording = self.recordings.load(path, params)
+        if recording is None:
+            return 404, {"message": f"No recording for {path} {dict(params.multi_items())}"}
+        return recording["status"], recording["body"]
+
+    async def handle_async_request(self, request):
+        status, body = await self.respond(request.url.path, request.url.params)
+        return httpx.Response(status, json=body)
+
+
+def upstream_transport(**options):
+    """Transport for the shared api-sports client, or None for a plain live one.
+
+    options (http2, limits) configure the real transport when recording.
+    """
+    if BACKEND == "record":
+        return RecordingTransport(Recordings(RECORDINGS_DIR), httpx.AsyncHTTPTransport(**options))
+    if BACKEND == "replay":
+        return ReplayTransport(Recordings(RECORDINGS_DIR), REPLAY_LATENCY_MS, REPLAY_ERROR_RATE)
+    if BACKEND != "live":
+        raise ValueError(f"Unknown API_BACKEND: {BACKEND}")
+    return None
+
+
+# Stand-in api-sports server over the recordings
+replay_app = FastAPI(title="api-sports replay")
+_replay = ReplayTransport(Recordings(RECORDINGS_DIR), REPLAY_LATENCY_MS, REPLAY_ERROR_RATE)
+
+
+@replay_app.get("/{path:path}")
+async def replay(path: str, request: Request):
+    status, body = await _replay.respond(f"/{path}", httpx.QueryParams(str(request.query_params)))
+    return JSONResponse(body, status_code=status)
@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .name_index import NameIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leagues (
+    league_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fixtures (
+    fixture_id INTEGER PRIMARY KEY,
+    league_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    status TEXT,
+    home_id INTEGER NOT NULL,
+    home_name TEXT,
+    away_id INTEGER NOT NULL,
+    away_name TEXT,
+    home_goals INTEGER,
+    away_goals INTEGER,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fixtures_home ON fixtures (home_id, season, date);
+CREATE INDEX IF NOT EXISTS fixtures_away ON fixtures (away_id, season, date);
+CREATE TABLE IF NOT EXISTS fixture_payloads (
+    fixture_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (fixture_id, kind)
+);
+CREATE TABLE IF NOT EXISTS player_seasons (
+    player_id INTEGER NOT NULL,
+    league_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    team_id INTEGER,
+    name TEXT NOT NULL,
+    position TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (player_id, league_id, season)
+);
+CREATE INDEX IF NOT EXISTS player_seasons_team ON player_seasons (team_id, season);
+CREATE TABLE IF NOT EXISTS standings (
+    league_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (league_id, season)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    league_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    watermark TEXT,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (league_id, season)
+);
+"""
+
+
+class Warehouse:
+    """Local SQLite copy of fixtures, fixture statistics, player stats and standings.
+
+    Raw api-sports payloads are stored as JSON next to the columns used
+    for lookups, so the fetch functions can answer from it unchanged.
+    Populated by warehouse_sync.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def _write(self, sql, rows):
+        with self._lock:
+            self.db.executemany(sql, rows)
+            self.db.commit()
+
+    # Writes, used by the sync job
+
+    def upsert_league(self, league_id, name):
+        self._write("INSERT OR REPLACE INTO leagues (league_id, name) VALUES (?, ?)", [(league_id, name)])
+
+    def upsert_fixtures(self, league_id, season, fixtures):
+        self._write(
+            "INSERT OR REPLACE INTO fixtures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    f["fixture"]["id"], league_id, season, f["fixture"]["date"],
+                    f["fixture"]["status"]["short"],
+                    f["teams"]["home"]["id"], f["teams"]["home"]["name"],
+                    f["teams"]["away"]["id"], f["teams"]["away"]["name"],
+                    f["goals"]["home"], f["goals"]["away"],
+                    json.dumps(f)
+                )
+                for f in fixtures
+            ]
+        )
+
+    def put_payload(self, fixture_id, kind, payload):
+        self._write(
+            "INSERT OR REPLACE INTO fixture_payloads (fixture_id, kind, payload) VALUES (?, ?, ?)",
+            [(fixture_id, kind, json.dumps(payload))]
+        )
+
+    def missing_payloads(self, league_id, season, kind):
+        """IDs of synced fixtures that don't have a payload of this kind yet."""
+        rows = self._query(
+            "SELECT fixture_id FROM fixtures WHERE league_id = ? AND season = ? AND fixture_id NOT IN "
+            "(SELECT fixture_id FROM fixture_payloads WHERE kind = ?)",
+            (league_id, season, kind)
+        )
+        return [row[0] for row in rows]
+
+    def upsert_player_seasons(self, league_id, season, players):
+        rows = []
+        for item in players:
+            stats = next((s for s in item["statistics"] if s["league"]["id"] == league_id), item["statistics"][0])
+            rows.append((
+                item["player"]["id"], league_id, season, stats["team"]["id"],
+                item["player"]["name"], stats["games"].get("position"), json.dumps(item)
+            ))
+        self._write("INSERT OR REPLACE INTO player_seasons VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def put_standings(self, league_id, season, payload):
+        self._write(
+            "INSERT OR REPLACE INTO standings VALUES (?, ?, ?, ?)",
+            [(league_id, season, json.dumps(payload), time.time())]
+        )
+
+    def watermark(self, league_id, season):
+        rows = self._query("SELECT watermark FROM sync_state WHERE league_id = ? AND season = ?", (league_id, season))
+        return rows[0][0] if rows else None
+
+    def set_watermark(self, league_id, season, watermark):
+        self._write("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)", [(league_id, season, watermark, time.time())])
+
+    # Reads
+
+    def team_fixtures(self, team_id, season, limit):
+        """A team's finished fixtures of a season, newest first."""
+        rows = self._query(
+            "SELECT payload FROM fixtures WHERE (home_id = ? OR away_id = ?) AND season = ? "
+            "AND status IN ('FT', 'AET', 'PEN') ORDER BY date DESC LIMIT ?",
+            (team_id, team_id, season, limit)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def h2h_fixtures(self, team_1_id, team_2_id):
+        """Every stored fixture between two teams, newest first."""
+        rows = self._query(
+            "SELECT payload FROM fixtures WHERE (home_id = ? AND away_id = ?) OR (home_id = ? AND away_id = ?) "
+            "ORDER BY date DESC",
+            (team_1_id, team_2_id, team_2_id, team_1_id)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def league_fixtures(self, league_id, seasons=None):
+        """Every stored fixture of a league, optionally limited to some seasons."""
+        sql = "SELECT payload FROM fixtures WHERE league_id = ?"
+        params = [league_id]
+        if seasons:
+            sql += f" AND season IN ({', '.join('?' * len(seasons))})"
+            params.extend(seasons)
+        return [json.loads(row[0]) for row in self._query(sql, params)]
+
+    def fixture_payload(self, fixture_id, kind):
+        rows = self._query("SELECT payload FROM fixture_payloads WHERE fixture_id = ? AND kind = ?", (fixture_id, kind))
+        if not rows:
+            return {"error_code": 404, "message": f"No {kind} stored for fixture {fixture_id}"}
+        return json.loads(rows[0][0])
+
+    def player_season(self, player_id, league_id, season):
+        rows = self._query(
+            "SELECT payload FROM player_seasons WHERE player_id = ? AND league_id = ? AND season = ?",
+            (player_id, league_id, season)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def squad(self, team_id, season):
+        """(player_id, name, position) of every player stored for a team season."""
+        return self._query(
+            "SELECT player_id, name, position FROM player_seasons WHERE team_id = ? AND season = ? ORDER BY player_id",
+            (team_id, season)
+        )
+
+    def standings(self, league_id, season):
+        rows = self._query("SELECT payload FROM standings WHERE league_id = ? AND season = ?", (league_id, season))
+        return json.loads(rows[0][0]) if rows else None
+
+    # Name resolution, mirroring the ids module
+
+    def get_league_id(self, league_name):
+        index = NameIndex(self._query("SELECT name, league_id FROM leagues ORDER BY league_id"))
+        match = index.resolve(league_name)
+        if match is None:
+            return {"error_code": 404, "message": f"League not synced: {league_name}"}
+        return match[1]
+
+    def get_team_id(self, team_name, league_name, season):
+        league_id = self.get_league_id(league_name)
+        if isinstance(league_id, dict):
+            return league_id
+
+        index = NameIndex(self._query(
+            "SELECT home_name, home_id FROM fixtures WHERE league_id = ? AND season = ? "
+            "UNION SELECT away_name, away_id FROM fixtures WHERE league_id = ? AND season = ?",
+            (league_id, season, league_id, season)
+        ))
+        match = index.resolve(team_name)
+        if match is None:
+            return {"error_code": 404, "message": f"Team not found: {team_name}"}
+        return match[1]
+
+    def get_player_id(self, player_name, team_name, league_name, season):
+        team_id = self.get_team_id(team_name, league_name, season)
+        if isinstance(team_id, dict):
+            return team_id
+
+        rows = self._query("SELECT name, player_id, position FROM player_seasons WHERE team_id = ? AND season = ?", (team_id, season))
+        index = NameIndex((name, (player_id, name, position)) for name, player_id, position in rows)
+        match = index.resolve(player_name, min_score=60)
+        if match is None:
+            return {"error_code": 404, "message": f"Player not found: {player_name}"}
+        return match[1]
+
+
+warehouse = Warehouse(os.getenv("WAREHOUSE_DB", "warehouse.db"))
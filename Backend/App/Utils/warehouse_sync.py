@@ -0,0 +1,117 @@
+"""Incremental sync of league data from api-sports into the local warehouse.
+
+Only fixtures finished since the last sync (the watermark) are listed, and
+statistics are only fetched for fixtures that don't have them yet:
+
+    python -m Backend.App.Utils.warehouse_sync --league "Premier League" --league "Serie A" --players
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from .http_client import api_get, gather_bounded, close_client
+from .rate_limit import background_requests
+from .fetch_data import fixture_statistics, fixture_players
+from .ids import get_league_id, get_season_year
+from .warehouse import warehouse
+
+
+async def sync_fixture_payloads(league_id, season, kind, fetch):
+    """Fetch and store the payloads still missing for a league season."""
+    missing = warehouse.missing_payloads(league_id, season, kind)
+    payloads = await gather_bounded(fetch(fixture_id) for fixture_id in missing)
+
+    stored = 0
+    for fixture_id, payload in zip(missing, payloads):
+        # Failed or still empty payloads are retried on the next sync
+        if "error_code" not in payload and payload.get("response"):
+            warehouse.put_payload(fixture_id, kind, payload)
+            stored += 1
+    return stored
+
+
+async def sync_player_seasons(league_id, season):
+    """Store every player's season statistics of a league, one page at a time."""
+    page = 1
+    total = 0
+    while True:
+        response = await api_get("/players", params={"league": league_id, "season": season, "page": page})
+        if response.status_code != 200:
+            break
+
+        data = response.json()
+        players = data.get("response", [])
+        warehouse.upsert_player_seasons(league_id, season, players)
+        total += len(players)
+
+        if page >= data.get("paging", {}).get("total", 1):
+            break
+        page += 1
+    return total
+
+
+async def sync_league(league_name, season, players=False):
+    """Bring one league season of the warehouse up to date and report what changed."""
+    league_id = await get_league_id(league_name)
+    if not league_id or isinstance(league_id, dict):
+        raise ValueError(f"League not found: {league_name}")
+    warehouse.upsert_league(league_id, league_name)
+
+    watermark = warehouse.watermark(league_id, season)
+    params = {"league": league_id, "season": season, "status": "FT-AET-PEN"}
+    if watermark:
+        # Start from the watermark day itself; already stored fixtures are simply replaced
+        params["from"] = watermark
+        params["to"] = date.today().isoformat()
+
+    response = await api_get("/fixtures", params=params)
+    if response.status_code != 200:
+        raise ValueError(f"Error fetching fixtures for {league_name}: {response.json().get('message')}")
+
+    fixtures = response.json().get("response", [])
+    warehouse.upsert_fixtures(league_id, season, fixtures)
+
+    summary = {
+        "league": league_name,
+        "season": season,
+        "fixtures": len(fixtures),
+        "statistics": await sync_fixture_payloads(league_id, season, "statistics", fixture_statistics),
+        "players": await sync_fixture_payloads(league_id, season, "players", fixture_players)
+    }
+
+    standings = await api_get("/standings", params={"league": league_id, "season": season})
+    if standings.status_code == 200:
+        warehouse.put_standings(league_id, season, standings.json())
+
+    # Season totals change after every matchday, so they are refreshed on request
+    if players:
+        summary["player_seasons"] = await sync_player_seasons(league_id, season)
+
+    if fixtures:
+        watermark = max([f["fixture"]["date"][:10] for f in fixtures] + ([watermark] if watermark else []))
+    warehouse.set_watermark(league_id, season, watermark)
+    summary["watermark"] = watermark
+    return summary
+
+
+async def sync(leagues, season, players=False):
+    try:
+        with background_requests():
+            return [await sync_league(league_name, season, players) for league_name in leagues]
+    finally:
+        await close_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync league data into the local warehouse.")
+    parser.add_argument("--league", action="append", required=True, help="League name, may be repeated")
+    parser.add_argument("--season", type=int, help="Season year (default: current)")
+    parser.add_argument("--players", action="store_true", help="Also refresh player season statistics")
+    args = parser.parse_args()
+
+    for summary in asyncio.run(sync(args.league, args.season or get_season_year(), args.players)):
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
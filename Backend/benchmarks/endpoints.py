@@ -0,0 +1,241 @@
+"""End-to-end benchmarks of the API endpoints against recorded upstream responses.
+
+Record a session once against api-sports, with the same names as below:
+
+    API_BACKEND=record API_RECORDINGS_DIR=recordings uvicorn Backend.App.Api.main:app
+    (call every endpoint once)
+
+then benchmark without network and compare runs across commits:
+
+    python -m Backend.benchmarks.endpoints --recordings recordings --output before.json
+    python -m Backend.benchmarks.endpoints --recordings recordings --compare before.json
+
+For every endpoint this reports the cold request (all caches empty), p50/p95/p99
+latency of warm requests, throughput at fixed concurrency levels, upstream
+calls per request, and CPU time split into model fitting/inference and the
+rest, with the remainder of the wall time spent waiting on I/O.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+from datetime import datetime, timezone
+
+ENDPOINTS = [
+    ("get", "/standings/", None),
+    ("post", "/teams/h2h", "teams"),
+    ("post", "/teams/h2h/latest", "teams"),
+    ("post", "/teams/recent", "teams"),
+    ("post", "/players/stats", "player"),
+    ("post", "/players/recent", "player"),
+    ("post", "/player_predictions/recent", "player"),
+    ("post", "/team_predictions/predict", "teams"),
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * q / 100
+    low, high = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+class ModelTimer:
+    """Accumulates CPU time spent inside the model code while it is installed."""
+
+    def __init__(self):
+        self.cpu = 0.0
+
+    def wrap(self, owner, name):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.process_time()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.cpu += time.process_time() - start
+
+        setattr(owner, name, timed)
+
+    def install(self):
+        from Backend.App.Ml_Models import player_predictions, prediction_cache, team_predictions
+
+        self.wrap(prediction_cache, "predict_latest")
+        self.wrap(team_predictions, "predict_latest")
+        self.wrap(player_predictions, "predict_latest")
+
+
+def reset_caches():
+    """Empty every in-process cache so the next request starts cold."""
+    from Backend.App.Ml_Models.feature_store import feature_store
+    from Backend.App.Ml_Models.prediction_cache import prediction_cache
+    from Backend.App.Utils import fetch_data, ids
+    from Backend.App.Utils.fixture_index import fixture_index
+    from Backend.App.Utils.fixture_store import fixture_store
+    from Backend.App.Utils.standings_snapshot import standings_snapshot
+
+    fixture_store.clear()
+    fixture_index.clear()
+    ids.id_cache.clear()
+    ids._indexes.clear()
+    fetch_data._player_indexes.clear()
+    standings_snapshot.data = None
+    prediction_cache.clear()
+    feature_store.clear()
+
+
+async def timed_request(client, method, url, body, model_timer):
+    from Backend.App.Utils.http_client import upstream_stats
+
+    upstream = upstream_stats["requests"]
+    model_cpu = model_timer.cpu
+    wall, cpu = time.perf_counter(), time.process_time()
+    response = await client.request(method, url, json=body)
+    return {
+        "status": response.status_code,
+        "wall_ms": (time.perf_counter() - wall) * 1000,
+        "cpu_ms": (time.process_time() - cpu) * 1000,
+        "model_cpu_ms": (model_timer.cpu - model_cpu) * 1000,
+        "upstream_calls": upstream_stats["requests"] - upstream
+    }
+
+
+async def throughput(client, method, url, body, concurrency, requests):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await client.request(method, url, json=body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def summarize(samples):
+    wall = [s["wall_ms"] for s in samples]
+    n = len(samples)
+    cpu = sum(s["cpu_ms"] for s in samples) / n
+    model_cpu = sum(s["model_cpu_ms"] for s in samples) / n
+    mean_wall = sum(wall) / n
+    return {
+        "p50_ms": round(percentile(wall, 50), 3),
+        "p95_ms": round(percentile(wall, 95), 3),
+        "p99_ms": round(percentile(wall, 99), 3),
+        "upstream_calls_per_request": round(sum(s["upstream_calls"] for s in samples) / n, 3),
+        "cpu_ms": round(cpu, 3),
+        "model_cpu_ms": round(model_cpu, 3),
+        "other_cpu_ms": round(cpu - model_cpu, 3),
+        "io_wait_ms": round(max(0.0, mean_wall - cpu), 3),
+        "errors": sum(1 for s in samples if s["status"] >= 400)
+    }
+
+
+async def run(args, bodies):
+    import httpx
+    from Backend.App.Api.main import app
+
+    model_timer = ModelTimer()
+    if not args.model_workers:
+        # Model work in pool processes isn't visible to this process's CPU clock
+        model_timer.install()
+    results = {}
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            for method, url, body_kind in ENDPOINTS:
+                if args.endpoint and url not in args.endpoint:
+                    continue
+                body = bodies.get(body_kind)
+
+                reset_caches()
+                cold = await timed_request(client, method, url, body, model_timer)
+                warm = [await timed_request(client, method, url, body, model_timer) for _ in range(args.requests)]
+
+                results[url] = {
+                    "cold": {k: round(v, 3) for k, v in cold.items()},
+                    "warm": summarize(warm),
+                    "throughput_rps": {
+                        str(c): round(await throughput(client, method, url, body, c, args.requests), 2)
+                        for c in args.concurrency
+                    }
+                }
+                print(f"{url:<28} cold {cold['wall_ms']:8.1f} ms  p50 {results[url]['warm']['p50_ms']:8.2f} ms  "
+                      f"p99 {results[url]['warm']['p99_ms']:8.2f} ms  upstream/req {results[url]['warm']['upstream_calls_per_request']}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    print(f"\n{'endpoint':<28} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10}")
+    for url, result in current["endpoints"].items():
+        before = previous["endpoints"].get(url)
+        if before is None:
+            continue
+        print(f"{url:<28} {before['warm']['p50_ms']:11.2f} {result['warm']['p50_ms']:10.2f} "
+              f"{before['warm']['p95_ms']:11.2f} {result['warm']['p95_ms']:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints against recorded upstream responses.")
+    parser.add_argument("--recordings", default="recordings", help="Directory written by API_BACKEND=record")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latency added to every replayed upstream call")
+    parser.add_argument("--requests", type=int, default=50, help="Warm requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--model-workers", type=int, default=0,
+                        help="Model pool processes; 0 runs model work inline, which the CPU split needs")
+    parser.add_argument("--endpoint", action="append", help="Only benchmark this path, may be repeated")
+    parser.add_argument("--league", default="Premier League")
+    parser.add_argument("--team-1", default="Manchester United")
+    parser.add_argument("--team-2", default="Liverpool")
+    parser.add_argument("--player", default="Bruno Fernandes")
+    parser.add_argument("--player-team", help="Team of --player (default: --team-1)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare with")
+    args = parser.parse_args()
+
+    # The app reads its configuration at import time
+    os.environ.update({
+        "API_BACKEND": "replay",
+        "API_RECORDINGS_DIR": args.recordings,
+        "API_REPLAY_LATENCY_MS": str(args.latency_ms),
+        "API_RATE_PER_MINUTE": "1000000",
+        "API_RATE_BURST": "1000000",
+        "MODEL_WORKERS": str(args.model_workers),
+        "PREWARM_INTERVAL_SECONDS": "0",
+    })
+    os.environ.pop("FIXTURE_STORE_DIR", None)
+    os.environ.pop("ID_CACHE_DB", None)
+
+    bodies = {
+        "teams": {"team_1": args.team_1, "team_2": args.team_2, "league": args.league},
+        "player": {"player_name": args.player, "team_name": args.player_team or args.team_1, "league_name": args.league},
+    }
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "endpoints": asyncio.run(run(args, bodies))
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare the stat schemas with the per-field lookups they replaced.
+
+    python -m Backend.benchmarks.stat_extraction [--number 20000]
+"""
+import argparse
+import random
+import timeit
+
+from Backend.App.Utils.stat_schema import TEAM_MATCH_STATS, OUTFIELD_MATCH_STATS
+
+# Stat types in the order api-sports returns them
+TEAM_STAT_TYPES = [
+    "Shots on Goal", "Shots off Goal", "Total Shots", "Blocked Shots", "Shots insidebox",
+    "Shots outsidebox", "Fouls", "Corner Kicks", "Offsides", "Ball Possession", "Yellow Cards",
+    "Red Cards", "Goalkeeper Saves", "Total passes", "Passes accurate", "Passes %", "expected_goals",
+]
+
+
+def team_payload(rnd):
+    stats = [{"type": t, "value": rnd.randint(0, 20)} for t in TEAM_STAT_TYPES]
+    stats[9]["value"] = f"{rnd.randint(30, 70)}%"
+    stats[11]["value"] = None
+    return stats
+
+
+def player_payload(rnd):
+    return {
+        "games": {"minutes": rnd.choice([0, 45, 90]), "number": 8, "position": "M", "rating": "7.1"},
+        "offsides": None,
+        "shots": {"total": rnd.randint(0, 4), "on": rnd.randint(0, 2)},
+        "goals": {"total": None, "conceded": 0, "assists": rnd.randint(0, 1), "saves": None},
+        "passes": {"total": rnd.randint(10, 80), "key": rnd.randint(0, 3), "accuracy": "31"},
+        "tackles": {"total": rnd.randint(0, 5), "blocks": None, "interceptions": 1},
+        "duels": {"total": 8, "won": 4},
+        "dribbles": {"attempts": 2, "success": 1, "past": None},
+        "fouls": {"drawn": 1, "committed": None},
+        "cards": {"yellow": 0, "red": 0},
+        "penalty": {"won": None, "commited": None, "scored": 0, "missed": 0, "saved": None},
+    }
+
+
+def legacy_team_match_stats(stats):
+    def get_stat(name):
+        for stat in stats:
+            if stat["type"] == name:
+                return stat["value"] or 0
+        return 0
+
+    return {
+        "shots_total": get_stat("Total Shots"),
+        "shots_on_target": get_stat("Shots on Goal"),
+        "shots_off_target": get_stat("Shots off Goal"),
+        "fouls": get_stat("Fouls"),
+        "corners": get_stat("Corner Kicks"),
+        "offsides": get_stat("Offsides"),
+        "ball_possession": get_stat("Ball Possession"),
+        "yellow_cards": get_stat("Yellow Cards"),
+        "red_cards": get_stat("Red Cards"),
+        "passes_total": get_stat("Total passes"),
+        "passes_accuracy": get_stat("Passes accurate")
+    }
+
+
+def legacy_player_match_stats(stats):
+    minutes_played = stats.get("games", {}).get("minutes", 0) or 0
+    return {
+        "games": {"appearances": 1 if minutes_played > 0 else 0, "minutes_played": minutes_played},
+        "goals": {
+            "total": stats.get("goals", {}).get("total", 0) or 0,
+            "assists": stats.get("goals", {}).get("assists", 0) or 0,
+            "totalshots": stats.get("shots", {}).get("total", 0) or 0,
+            "shotsongoal": stats.get("shots", {}).get("on", 0) or 0
+        },
+        "passes": {
+            "total": stats.get("passes", {}).get("total", 0) or 0,
+            "key": stats.get("passes", {}).get("key", 0) or 0,
+            "accuracy": stats.get("passes", {}).get("accuracy", 0) or 0
+        },
+        "tackles": {
+            "total": stats.get("tackles", {}).get("total", 0) or 0,
+            "blocks": stats.get("tackles", {}).get("blocks", 0) or 0,
+            "interceptions": stats.get("tackles", {}).get("interceptions", 0) or 0
+        },
+        "duels": {
+            "total": stats.get("duels", {}).get("total", 0) or 0,
+            "won": stats.get("duels", {}).get("won", 0) or 0
+        },
+        "dribbles": {
+            "attempts": stats.get("dribbles", {}).get("attempts", 0) or 0,
+            "success": stats.get("dribbles", {}).get("success", 0) or 0
+        },
+        "fouls": {
+            "drawn": stats.get("fouls", {}).get("drawn", 0) or 0,
+            "committed": stats.get("fouls", {}).get("committed", 0) or 0
+        },
+        "cards": {
+            "yellow": stats.get("cards", {}).get("yellow", 0) or 0,
+            "red": stats.get("cards", {}).get("red", 0) or 0
+        }
+    }
+
+
+CASES = [
+    ("team statistics", team_payload, legacy_team_match_stats, TEAM_MATCH_STATS.extract),
+    ("player statistics", player_payload, legacy_player_match_stats, OUTFIELD_MATCH_STATS.extract),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Payloads extracted per run")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    for name, make_payload, legacy, schema in CASES:
+        payloads = [make_payload(rnd) for _ in range(args.number)]
+        assert all(legacy(p) == schema(p) for p in payloads), f"{name}: outputs differ"
+
+        results = {}
+        for label, extract in (("legacy", legacy), ("schema", schema)):
+            runs = timeit.repeat(lambda: [extract(p) for p in payloads], number=1, repeat=5)
+            results[label] = min(runs) / args.number * 1e6
+        print(f"{name:<18} legacy {results['legacy']:6.2f} us  schema {results['schema']:6.2f} us  "
+              f"x{results['legacy'] / results['schema']:.2f}")
+
+
+if __name__ == "__main__":
+    main()